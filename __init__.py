@@ -6,10 +6,18 @@ from .nodes.open_ai_image_generate import MaiOpenAiImageGenerate
 from .nodes.google_image_generate import MaiGoogleImageGenerate
 from .nodes.open_ai_llm_text import MaiOpenAiLLMText
 from .nodes.google_veo_image_to_video import MaiGoogleVeoImageToVideo
+from .nodes.google_veo_submit import MaiGoogleVeoSubmit
+from .nodes.google_veo_await_result import MaiGoogleVeoAwaitResult
 from .nodes.google_gemini_text import MaiGoogleGeminiText
 from .nodes.google_gemini_image import MaiGoogleGeminiImage
 from .nodes.image_saturation import MaiImageSaturation
 from .nodes.image_contrast import MaiImageContrast
+from .nodes.batch_job import MaiBatchJob
+from .nodes.load_encoded_image import MaiLoadEncodedImage
+from .helpers.prewarm_helpers import register_prewarm_hook
+from .helpers.profile_helpers import profile_nodes
+
+register_prewarm_hook()
 
 NODE_CLASS_MAPPINGS = {
     "MaiLLMText": MaiLLMText,
@@ -20,12 +28,18 @@ NODE_CLASS_MAPPINGS = {
     "MaiOpenAiImageGenerate": MaiOpenAiImageGenerate,
     "MaiGoogleImageGenerate": MaiGoogleImageGenerate,
     "MaiGoogleVeoImageToVideo": MaiGoogleVeoImageToVideo,
+    "MaiGoogleVeoSubmit": MaiGoogleVeoSubmit,
+    "MaiGoogleVeoAwaitResult": MaiGoogleVeoAwaitResult,
     "MaiGoogleGeminiText": MaiGoogleGeminiText,
     "MaiGoogleGeminiImage": MaiGoogleGeminiImage,
     "MaiImageSaturation": MaiImageSaturation,
     "MaiImageContrast": MaiImageContrast,
+    "MaiBatchJob": MaiBatchJob,
+    "MaiLoadEncodedImage": MaiLoadEncodedImage,
 }
 
+profile_nodes(NODE_CLASS_MAPPINGS)
+
 NODE_DISPLAY_NAME_MAPPINGS = {
     "MaiLLMText": "mAI - LLM Text",
     "MaiLLMReasoning": "mAI - LLM Reasoning",
@@ -35,10 +49,14 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "MaiOpenAiImageGenerate": "mAI - OpenAI - Image Generate",
     "MaiGoogleImageGenerate": "mAI - Google - Image Generate",
     "MaiGoogleVeoImageToVideo": "mAI - Google - Veo Image to Video",
+    "MaiGoogleVeoSubmit": "mAI - Google - Veo Submit",
+    "MaiGoogleVeoAwaitResult": "mAI - Google - Veo Await Result",
     "MaiGoogleGeminiText": "mAI - Google - Gemini Text",
     "MaiGoogleGeminiImage": "mAI - Google - Gemini Image",
     "MaiImageSaturation": "mAI - Image Saturation",
     "MaiImageContrast": "mAI - Image Contrast",
+    "MaiBatchJob": "mAI - Batch Job",
+    "MaiLoadEncodedImage": "mAI - Load Encoded Image",
 }
 
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS"]
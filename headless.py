@@ -0,0 +1,408 @@
+"""
+Run mAI nodes without a ComfyUI server.
+
+    python headless.py --node MaiLLMText --jobs jobs.jsonl --out out/ --workers 8
+
+Every line of the jobs file is a JSON object with the node inputs, or
+{"node": "<class name>", "inputs": {...}} to mix node classes in one file.
+Widgets that a job leaves out take their default, as in the ComfyUI editor.
+IMAGE and MASK inputs are given as image file paths, ENCODED_IMAGE inputs as
+paths that are memory-mapped without decoding. Outputs are written to
+<out>/<line number>/ as .txt (strings), .png (images), .mp4 (videos), .wav
+(audio) or .json (everything else).
+
+ComfyUI modules the nodes import (server, folder_paths, comfy.utils,
+comfy_api) are replaced with minimal stand-ins when they cannot be imported;
+the comfy_api stand-in decodes videos with PyAV (the av package).
+"""
+
+import os
+import sys
+import json
+import types
+import shutil
+import argparse
+import importlib
+import importlib.util
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = "mai_nodes"
+
+
+def _missing(module_name):
+    try:
+        return importlib.util.find_spec(module_name) is None
+    except ModuleNotFoundError:
+        return True
+
+
+def _stub_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def install_stubs(output_dir):
+    """
+    Register stand-ins for the ComfyUI modules that cannot be imported.
+
+    Args:
+        output_dir: Used as the output directory of the folder_paths stand-in
+    """
+    if _missing("server"):
+
+        class PromptQueue:
+            currently_running = {}
+
+        class PromptServer:
+            instance = None
+
+            def __init__(self):
+                self.prompt_queue = PromptQueue()
+
+            def add_on_prompt_handler(self, handler):
+                pass
+
+            def send_sync(self, event, data, sid=None):
+                pass
+
+        PromptServer.instance = PromptServer()
+        _stub_module("server", PromptServer=PromptServer)
+
+    if _missing("folder_paths"):
+
+        def get_output_directory():
+            return output_dir
+
+        def get_input_directory():
+            return os.getcwd()
+
+        def get_annotated_filepath(name):
+            return os.path.join(get_input_directory(), name)
+
+        def get_save_image_path(prefix, output_dir, width=0, height=0):
+            folder = os.path.join(output_dir, os.path.dirname(prefix))
+            filename = os.path.basename(prefix)
+            os.makedirs(folder, exist_ok=True)
+            counter = len(os.listdir(folder)) + 1
+            return folder, filename, counter, os.path.dirname(prefix), prefix
+
+        _stub_module(
+            "folder_paths",
+            get_output_directory=get_output_directory,
+            get_input_directory=get_input_directory,
+            get_annotated_filepath=get_annotated_filepath,
+            get_save_image_path=get_save_image_path,
+        )
+
+    if _missing("comfy"):
+        _stub_module("comfy")
+
+    if _missing("comfy.utils"):
+
+        class ProgressBar:
+            def __init__(self, total):
+                self.total = total
+
+            def update_absolute(self, value, total=None, preview=None):
+                pass
+
+            def update(self, value):
+                pass
+
+        _stub_module("comfy.utils", ProgressBar=ProgressBar)
+
+    if _missing("comfy_api"):
+
+        class VideoFromFile:
+            # Decodes with PyAV, like comfy_api's VideoFromFile
+            def __init__(self, file):
+                self.file = file
+
+            def _open(self):
+                import av
+
+                if hasattr(self.file, "seek"):
+                    self.file.seek(0)
+                return av.open(self.file)
+
+            def get_components(self):
+                import av
+                import torch
+                import numpy as np
+
+                with self._open() as container:
+                    stream = container.streams.video[0]
+                    frame_rate = float(stream.average_rate or 30)
+                    frames = [
+                        frame.to_ndarray(format="rgb24")
+                        for frame in container.decode(stream)
+                    ]
+                images = torch.from_numpy(np.stack(frames)).float() / 255.0
+
+                audio = None
+                with self._open() as container:
+                    if container.streams.audio:
+                        sample_rate = container.streams.audio[0].sample_rate
+                        resampler = av.AudioResampler(format="fltp")
+                        chunks = []
+                        for frame in container.decode(audio=0):
+                            resampled = resampler.resample(frame)
+                            if not isinstance(resampled, list):
+                                resampled = [resampled]
+                            chunks.extend(r.to_ndarray() for r in resampled)
+                        if chunks:
+                            waveform = torch.from_numpy(np.concatenate(chunks, 1))
+                            audio = {
+                                "waveform": waveform.float().unsqueeze(0),
+                                "sample_rate": sample_rate,
+                            }
+
+                return types.SimpleNamespace(
+                    images=images, audio=audio, frame_rate=frame_rate
+                )
+
+            def save_to(self, path, **kwargs):
+                if isinstance(self.file, str):
+                    shutil.copyfile(self.file, path)
+                    return
+                self.file.seek(0)
+                with open(path, "wb") as f:
+                    f.write(self.file.read())
+
+        _stub_module("comfy_api")
+        _stub_module("comfy_api.input_impl")
+        _stub_module("comfy_api.input_impl.video_types", VideoFromFile=VideoFromFile)
+
+
+def load_package(output_dir="output"):
+    """
+    Import the node package from this directory.
+
+    Returns:
+        module: The package, exposing NODE_CLASS_MAPPINGS
+    """
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+
+    install_stubs(output_dir)
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME,
+        os.path.join(PACKAGE_DIR, "__init__.py"),
+        submodule_search_locations=[PACKAGE_DIR],
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def _input_specs(node_class):
+    declared = node_class.INPUT_TYPES()
+    specs = {}
+    for section in ("required", "optional"):
+        specs.update(declared.get(section, {}))
+    return specs
+
+
+def _widget_default(spec):
+    # Widget values the UI would fill in; linked inputs have none
+    options = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+    if "default" in options:
+        return options["default"]
+    if isinstance(spec[0], (list, tuple)) and spec[0]:
+        return spec[0][0]
+    return None
+
+
+def _load_image(path, as_mask=False):
+    import torch
+    import numpy as np
+    from PIL import Image
+
+    pil_image = Image.open(path)
+    if as_mask:
+        mask = np.array(pil_image.convert("L")).astype(np.float32) / 255.0
+        return torch.from_numpy(mask).unsqueeze(0)
+    image = np.array(pil_image.convert("RGB")).astype(np.float32) / 255.0
+    return torch.from_numpy(image).unsqueeze(0)
+
+
+def _write_wav(path, audio):
+    import wave
+
+    # (1, channels, samples) float in [-1, 1] -> interleaved 16-bit PCM
+    samples = audio["waveform"][0].clamp(-1, 1).mul(32767).short().t().contiguous()
+    with wave.open(path, "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(int(audio["sample_rate"]))
+        f.writeframes(samples.cpu().numpy().tobytes())
+
+
+def _write_output(out_dir, name, value):
+    import torch
+
+    if value is None:
+        return
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            _write_output(out_dir, f"{name}_{i}", item)
+        return
+    if isinstance(value, str):
+        with open(os.path.join(out_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(value)
+        return
+    if isinstance(value, torch.Tensor) and value.dim() == 4:
+        from PIL import Image
+
+        if value.shape[-1] not in (1, 3, 4) and value.shape[1] in (1, 3, 4):
+            # Channels-first frames (BCHW)
+            value = value.permute(0, 2, 3, 1)
+        if value.shape[-1] not in (1, 3, 4):
+            print(f"[headless] Skipping {name}: unexpected shape {tuple(value.shape)}")
+            return
+        frames = (value * 255.0).clamp(0, 255).to(torch.uint8).cpu().numpy()
+        for i, frame in enumerate(frames):
+            if frame.shape[-1] == 1:
+                frame = frame[:, :, 0]
+            Image.fromarray(frame).save(os.path.join(out_dir, f"{name}_{i:05}.png"))
+        return
+    if isinstance(value, dict) and "waveform" in value:
+        _write_wav(os.path.join(out_dir, f"{name}.wav"), value)
+        return
+    if hasattr(value, "save_to"):
+        value.save_to(os.path.join(out_dir, f"{name}.mp4"))
+        return
+    with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(value, f, default=str)
+
+
+def run_node(node_name, inputs, out_dir=None):
+    """
+    Execute one node with JSON inputs.
+
+    Args:
+        node_name: A key of NODE_CLASS_MAPPINGS
+        inputs: The node inputs; IMAGE and MASK inputs as image file paths.
+            Widgets left out take their INPUT_TYPES default, or the first
+            option of a combo list.
+        out_dir: If given, outputs are written there
+
+    Returns:
+        tuple: The node's outputs
+    """
+    package = load_package()
+    node_class = package.NODE_CLASS_MAPPINGS[node_name]
+    specs = _input_specs(node_class)
+    types_by_name = {name: spec[0] for name, spec in specs.items()}
+
+    kwargs = {}
+    for name, spec in specs.items():
+        default = _widget_default(spec)
+        if default is not None:
+            kwargs[name] = default
+    kwargs.update(inputs)
+    for name, value in inputs.items():
+        if not isinstance(value, str):
+            continue
+        if types_by_name.get(name) in ("IMAGE", "MASK"):
+            kwargs[name] = _load_image(value, as_mask=types_by_name[name] == "MASK")
+        elif types_by_name.get(name) == "ENCODED_IMAGE":
+            image_helpers = importlib.import_module(
+                f"{PACKAGE_NAME}.helpers.image_helpers"
+            )
+            kwargs[name] = image_helpers.load_encoded_image(value)
+
+    node = node_class()
+    outputs = getattr(node, node_class.FUNCTION)(**kwargs)
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        names = getattr(node_class, "RETURN_NAMES", None) or node_class.RETURN_TYPES
+        for name, value in zip(names, outputs):
+            _write_output(out_dir, name, value)
+
+    return outputs
+
+
+def _run_job(job):
+    index, node_name, inputs, out_dir = job
+    try:
+        run_node(node_name, inputs, out_dir)
+        return index, None
+    except Exception:
+        return index, traceback.format_exc()
+
+
+def _init_worker(output_dir):
+    load_package(output_dir)
+
+
+def run_jobs(jobs, output_dir, workers=4, processes=False):
+    """
+    Run (node_name, inputs) jobs on a thread or process pool.
+
+    Args:
+        jobs: An iterable of (node_name, inputs)
+        output_dir: Outputs of job i go to <output_dir>/<i>
+        workers: Pool size
+        processes: Use a process pool instead of threads
+
+    Returns:
+        list: (index, error traceback or None) per job
+    """
+    work = [
+        (i, node_name, inputs, os.path.join(output_dir, str(i)))
+        for i, (node_name, inputs) in enumerate(jobs)
+    ]
+    if processes:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(output_dir,)
+        )
+    else:
+        load_package(output_dir)
+        pool = ThreadPoolExecutor(max_workers=workers)
+    with pool:
+        return list(pool.map(_run_job, work))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--node", help="Default node class for every job")
+    parser.add_argument("--jobs", required=True, help="JSONL file of node inputs")
+    parser.add_argument("--out", default="output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=4, help="Pool size")
+    parser.add_argument(
+        "--processes", action="store_true", help="Use processes instead of threads"
+    )
+    args = parser.parse_args(argv)
+
+    jobs = []
+    with open(args.jobs, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if "inputs" in job:
+                jobs.append((job.get("node", args.node), job["inputs"]))
+            else:
+                jobs.append((args.node, job))
+
+    failed = 0
+    for index, error in run_jobs(jobs, args.out, args.workers, args.processes):
+        if error:
+            failed += 1
+            print(f"[{index}] FAILED\n{error}", file=sys.stderr)
+    print(f"{len(jobs) - failed}/{len(jobs)} jobs succeeded; outputs in {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import os
+import io
+import json
+import time
+import hashlib
+from . import http_helpers
+
+_DONE = ("completed", "done", "succeeded")
+_FAILED = ("failed", "error", "cancelled", "expired")
+
+
+def build_jsonl(bodies):
+    """
+    Build a batch input file with one request per line.
+
+    Args:
+        bodies: The request bodies, in order
+
+    Returns:
+        bytes: JSONL lines of {"custom_id": "<index>", "body": <body>}
+    """
+    return b"".join(
+        json.dumps({"custom_id": str(i), "body": body}).encode("utf-8") + b"\n"
+        for i, body in enumerate(bodies)
+    )
+
+
+class BatchJob:
+    """
+    A batch job on the proxy's batch endpoint whose progress survives restarts.
+
+    The job state (batch id, status, progress) is written to
+    <state_dir>/<job_key>.json after every change. Running the same job again
+    picks the stored batch id back up instead of submitting it twice.
+
+    Args:
+        batch_url: The proxy's batch endpoint, or a list of equivalent ones
+        headers: Request headers (including x-api-key)
+        endpoint: The per-request endpoint the batch should call
+        bodies: The request bodies, in order
+        state_dir: Where job state is persisted
+    """
+
+    def __init__(self, batch_url, headers, endpoint, bodies, state_dir):
+        if isinstance(batch_url, str):
+            batch_url = [batch_url]
+        self.endpoints = [u.rstrip("/") for u in batch_url]
+        self.headers = headers
+        self.endpoint = endpoint
+        self.bodies = bodies
+        # A single endpoint keys by its url, as before lists were accepted
+        key_url = batch_url[0] if len(batch_url) == 1 else batch_url
+        self.job_key = hashlib.sha256(
+            json.dumps([key_url, endpoint, bodies], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:32]
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, f"{self.job_key}.json")
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"batch_id": "", "status": "", "completed": 0, "total": 0}
+
+    def _save_state(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _served_url(self):
+        return self.state.get("batch_url") or self.endpoints[0]
+
+    def submit(self):
+        """
+        Submit the job unless a previous run already did.
+
+        Returns:
+            str: The batch id
+        """
+        if self.state["batch_id"]:
+            return self.state["batch_id"]
+
+        response = http_helpers.post(
+            self.endpoints,
+            headers=self.headers,
+            data={"endpoint": self.endpoint},
+            files={
+                "file": (
+                    "batch.jsonl",
+                    io.BytesIO(build_jsonl(self.bodies)),
+                    "application/jsonl",
+                )
+            },
+            timeout=120,
+            priority=http_helpers.BATCH,
+        )
+        response.raise_for_status()
+        batch_id = response.json().get("id", "")
+        if not batch_id:
+            raise RuntimeError("[ERROR] Batch endpoint returned no id.")
+
+        # With several endpoints the batch lives on the one that accepted it
+        self.state.update(
+            batch_id=batch_id,
+            batch_url=(response.url or self.endpoints[0]).rstrip("/"),
+            status="submitted",
+            total=len(self.bodies),
+            submitted_at=time.time(),
+        )
+        self._save_state()
+        return batch_id
+
+    def poll(self, timeout, interval=10.0, max_interval=120.0, on_progress=None):
+        """
+        Poll the job with backoff until it has finished.
+
+        Args:
+            timeout: Overall seconds to wait
+            interval: Seconds before the first status check
+            max_interval: Upper bound for the delay between checks
+            on_progress: Optional callable (completed, total)
+
+        Raises:
+            RuntimeError: If the job failed or did not finish within timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self.state["status"] not in _DONE:
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"[ERROR] Batch {self.state['batch_id']} did not finish "
+                    f"within {timeout}s; run again to resume."
+                )
+
+            response = http_helpers.get(
+                f"{self._served_url()}/{self.state['batch_id']}",
+                headers=self.headers,
+                timeout=30,
+                priority=http_helpers.BATCH,
+            )
+            response.raise_for_status()
+            status_json = response.json()
+
+            self.state.update(
+                status=str(status_json.get("status", "")).lower(),
+                completed=int(status_json.get("completed", 0)),
+                total=int(status_json.get("total", self.state["total"])),
+            )
+            self._save_state()
+
+            if on_progress is not None:
+                on_progress(self.state["completed"], self.state["total"])
+
+            if self.state["status"] in _FAILED:
+                failed_id = self.state["batch_id"]
+                # A dead batch cannot be resumed; the next run resubmits it
+                self.state.update(batch_id="", batch_url="", status="")
+                self._save_state()
+                raise RuntimeError(
+                    f"[ERROR] Batch {failed_id} "
+                    + str(status_json.get("error") or status_json.get("status"))
+                    + "; run again to resubmit."
+                )
+
+            if self.state["status"] not in _DONE:
+                http_helpers.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+                interval = min(interval * 1.5, max_interval)
+
+    def iter_results(self):
+        """
+        Stream the results line by line as they are downloaded.
+
+        Yields:
+            tuple: (index, response json or None, error or None)
+        """
+        response = http_helpers.get(
+            f"{self._served_url()}/{self.state['batch_id']}/results",
+            headers=self.headers,
+            timeout=300,
+            stream=True,
+            priority=http_helpers.BATCH,
+        )
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                yield (
+                    int(result["custom_id"]),
+                    result.get("response"),
+                    result.get("error"),
+                )
+        finally:
+            response.close()
@@ -0,0 +1,256 @@
+import os
+import io
+import json
+import time
+import sqlite3
+import hashlib
+import warnings
+import threading
+import torch
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    blob TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+"""
+
+
+def make_key(namespace, **inputs):
+    """
+    Build a cache key from a node name and its inputs.
+
+    Tensors are hashed by shape, dtype and content. Inputs named api_key are
+    ignored, since they do not change the result.
+
+    Args:
+        namespace: Usually the node class name
+        **inputs: The node inputs that determine the result
+
+    Returns:
+        str: A hex digest
+    """
+    h = hashlib.sha256(namespace.encode("utf-8"))
+    for name in sorted(inputs):
+        if name == "api_key":
+            continue
+        value = inputs[name]
+        h.update(b"\0" + name.encode("utf-8") + b"=")
+        if isinstance(value, torch.Tensor):
+            array = value.detach().cpu().contiguous().numpy()
+            h.update(f"tensor{tuple(array.shape)}{array.dtype}".encode("utf-8"))
+            h.update(array.tobytes())
+        else:
+            h.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed disk cache for generated images and videos.
+
+    Blobs are stored once per content hash under <root>/blobs and indexed in a
+    SQLite database in WAL mode, so several processes on one host can share
+    the same directory. Entries are evicted least recently used first once the
+    blobs exceed max_bytes.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(
+                os.path.join(self.root, "index.sqlite"),
+                timeout=30,
+                isolation_level=None,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _lookup(self, key, kind):
+        db = self._connect()
+        row = db.execute(
+            "SELECT blob, meta FROM entries WHERE key = ? AND kind = ?", (key, kind)
+        ).fetchone()
+        if row is None:
+            return None
+
+        path = self._blob_path(row[0])
+        if not os.path.exists(path):
+            self._forget(row[0])
+            return None
+
+        db.execute(
+            "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        return path, json.loads(row[1])
+
+    def _forget(self, digest):
+        # The blob file is gone, so every entry pointing at it is stale
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM entries WHERE blob = ?", (digest,))
+            db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def _store(self, key, kind, data, meta):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a unique name and rename, so readers in other
+            # processes never see a partial blob.
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)",
+                (digest, len(data)),
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, blob, kind, meta, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, digest, kind, json.dumps(meta or {}), time.time()),
+            )
+            orphans = self._evict(db)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+        for orphan in orphans:
+            try:
+                os.remove(self._blob_path(orphan))
+            except OSError:
+                pass
+
+    def _referenced_size(self, db):
+        return db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs "
+            "WHERE digest IN (SELECT blob FROM entries)"
+        ).fetchone()[0]
+
+    def _evict(self, db):
+        while self._referenced_size(db) > self.max_bytes:
+            row = db.execute(
+                "SELECT key FROM entries ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            db.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+
+        orphans = [
+            row[0]
+            for row in db.execute(
+                "SELECT digest FROM blobs "
+                "WHERE digest NOT IN (SELECT blob FROM entries)"
+            )
+        ]
+        db.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in orphans])
+        return orphans
+
+    def get_tensor(self, key):
+        """
+        Returns:
+            tuple: (IMAGE tensor, meta) or None on a miss
+        """
+        found = self._lookup(key, "tensor")
+        if found is None:
+            return None
+        path, meta = found
+        try:
+            array = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            # Evicted by another process since the lookup
+            self._forget(os.path.basename(path))
+            return None
+        with warnings.catch_warnings():
+            # The memory map is read-only; .float() copies it anyway.
+            warnings.simplefilter("ignore", UserWarning)
+            tensor = torch.from_numpy(array).float().div(255.0)
+        return tensor, meta
+
+    def put_tensor(self, key, tensor, meta=None):
+        array = (tensor.detach() * 255.0).round().clamp(0, 255).to(torch.uint8)
+        buf = io.BytesIO()
+        np.save(buf, array.cpu().numpy())
+        self._store(key, "tensor", buf.getvalue(), meta)
+
+    def get_bytes(self, key):
+        """
+        Returns:
+            tuple: (bytes, meta) or None on a miss. The bytes are a private
+            copy, so they stay valid after the blob is evicted.
+        """
+        found = self._lookup(key, "bytes")
+        if found is None:
+            return None
+        path, meta = found
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Evicted by another process since the lookup
+            self._forget(os.path.basename(path))
+            return None
+        return data, meta
+
+    def put_bytes(self, key, data, meta=None):
+        self._store(key, "bytes", bytes(data), meta)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Get the process-wide artifact cache.
+
+    The cache is enabled by setting MAI_CACHE_DIR. MAI_CACHE_MAX_BYTES bounds
+    its size (default 2 GiB).
+
+    Returns:
+        ArtifactCache: The cache, or None if caching is disabled
+    """
+    global _cache
+    root = os.environ.get("MAI_CACHE_DIR", "").strip()
+    if not root:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.root != root:
+            _cache = ArtifactCache(
+                root, int(os.environ.get("MAI_CACHE_MAX_BYTES", str(2 << 30)))
+            )
+        return _cache
@@ -0,0 +1,186 @@
+import os
+import sys
+import site
+import time
+import argparse
+import threading
+import importlib.util
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+_WORKER_DIR = os.path.dirname(os.path.abspath(__file__))
+_WORKER_NAME = "mai_encode_worker"
+
+
+def _worker_module():
+    # Registered under its top-level name, so spawned workers import only
+    # that file (numpy and PIL) and never the node package, torch or CUDA.
+    module = sys.modules.get(_WORKER_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            _WORKER_NAME, os.path.join(_WORKER_DIR, f"{_WORKER_NAME}.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_WORKER_NAME] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def _as_hwc(frame):
+    frame = np.asarray(frame, dtype=np.uint8)
+    if frame.ndim == 2:
+        frame = frame[:, :, None]
+    if frame.shape[2] not in _worker_module().MODES:
+        raise ValueError(f"Unexpected channel count: {frame.shape[2]}")
+    return frame
+
+
+class ProcessEncoder:
+    """
+    Encodes uint8 frames to base64 PNG on a pool of worker processes.
+
+    Each frame is copied once into a shared memory segment and the worker
+    reads it from there, so frames are never pickled. Only the base64 result
+    travels back through the pool. Workers are spawned rather than forked,
+    so they never inherit the threads, locks or CUDA state of ComfyUI.
+
+    Args:
+        max_workers: Worker process count (default: all cores)
+        compress_level: zlib level for the PNG encoder
+    """
+
+    def __init__(self, max_workers=None, compress_level=4):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.compress_level = compress_level
+        self._worker = _worker_module()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=site.addsitedir,
+            initargs=(_WORKER_DIR,),
+        )
+
+    def encode_png_b64(self, frames):
+        """
+        Encode frames to base64 PNG in parallel.
+
+        Args:
+            frames: An iterable of HWC (or HW) uint8 arrays or PIL Images; a
+                frame may be a reused buffer, it is copied before the next
+                one is requested
+
+        Returns:
+            list: The base64 bytes per frame, in order
+        """
+        segments = []
+        futures = []
+        try:
+            for frame in frames:
+                frame = _as_hwc(frame)
+                shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+                segments.append(shm)
+                np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)[...] = frame
+                futures.append(
+                    self._pool.submit(
+                        self._worker.encode_shared,
+                        shm.name,
+                        frame.shape,
+                        self.compress_level,
+                    )
+                )
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """
+    Get the process-pool encoder configured by the environment.
+
+    MAI_ENCODE_PROCESSES sets the worker count ("auto" for all cores). It is
+    off by default.
+
+    Returns:
+        ProcessEncoder: The shared encoder, or None to encode in-process
+    """
+    global _encoder
+    setting = os.environ.get("MAI_ENCODE_PROCESSES", "").strip().lower()
+    if setting in ("", "0"):
+        return None
+    with _encoder_lock:
+        if _encoder is None:
+            _encoder = ProcessEncoder(None if setting == "auto" else int(setting))
+        return _encoder
+
+
+def benchmark(width=3840, height=2160, frames=16, worker_counts=None):
+    """
+    Measure PNG/base64 throughput against the number of worker processes.
+
+    A worker count of 0 is the in-process baseline.
+
+    Returns:
+        list: (workers, frames per second, input MB per second)
+    """
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.integers(0, 24, (height, width, 3), dtype=np.uint8)
+    base = (gradient + noise).clip(0, 255).astype(np.uint8)
+    batch = [np.roll(base, i * 7, axis=1) for i in range(frames)]
+    megabytes = sum(frame.nbytes for frame in batch) / 1e6
+
+    cores = os.cpu_count() or 1
+    if worker_counts is None:
+        steps = {n for n in (1, 2, 4, 8, 16, 32) if n <= cores}
+        worker_counts = [0] + sorted(steps | {cores})
+
+    results = []
+    for workers in worker_counts:
+        if workers == 0:
+            start = time.perf_counter()
+            for frame in batch:
+                _worker_module().png_b64(frame, frame.shape, 4)
+            elapsed = time.perf_counter() - start
+        else:
+            encoder = ProcessEncoder(workers)
+            # Start the workers before timing
+            encoder.encode_png_b64(batch[:workers])
+            start = time.perf_counter()
+            encoder.encode_png_b64(batch)
+            elapsed = time.perf_counter() - start
+            encoder.shutdown()
+        results.append((workers, frames / elapsed, megabytes / elapsed))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PNG/base64 encoder benchmark")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="*")
+    args = parser.parse_args()
+
+    print(
+        f"{args.frames} frames of {args.width}x{args.height} "
+        f"on {os.cpu_count()} cores"
+    )
+    print(f"{'workers':>8} {'frames/s':>10} {'MB/s':>10}")
+    for workers, fps, mbps in benchmark(
+        args.width, args.height, args.frames, args.workers
+    ):
+        label = "inline" if workers == 0 else str(workers)
+        print(f"{label:>8} {fps:>10.2f} {mbps:>10.1f}")
@@ -0,0 +1,565 @@
+import os
+import re
+import time
+import socket
+import hashlib
+import threading
+import requests
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeout,
+    FIRST_COMPLETED,
+    wait,
+)
+from urllib.parse import urlsplit
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from .replay_helpers import get_transport, RECORD, REPLAY
+
+try:
+    import comfy.model_management as model_management
+except ImportError:
+    # Outside ComfyUI there is nothing that can interrupt a request
+    model_management = None
+
+INTERACTIVE = 0
+BATCH = 1
+
+# How often blocking waits check for a ComfyUI interrupt, in seconds
+INTERRUPT_POLL = 0.25
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limit combined with a cap on in-flight requests.
+
+    Waiting interactive callers are always admitted before waiting batch
+    callers. A rate of 0 disables the token bucket and a max_in_flight of 0
+    disables the concurrency cap. Waiting callers give up within
+    INTERRUPT_POLL seconds when the ComfyUI prompt is interrupted.
+    """
+
+    def __init__(self, rate=0.0, burst=1, max_in_flight=0):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_in_flight = int(max_in_flight)
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._waiting = {INTERACTIVE: 0, BATCH: 0}
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def acquire(self, priority=INTERACTIVE):
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    # Waits are sliced so a queued request sees an interrupt
+                    check_interrupted()
+
+                    if priority == BATCH and self._waiting[INTERACTIVE] > 0:
+                        self._cond.wait(INTERRUPT_POLL)
+                        continue
+
+                    if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                        self._cond.wait(INTERRUPT_POLL)
+                        continue
+
+                    self._refill()
+                    if self.rate > 0 and self.tokens < 1:
+                        self._cond.wait(
+                            min(INTERRUPT_POLL, (1 - self.tokens) / self.rate)
+                        )
+                        continue
+
+                    if self.rate > 0:
+                        self.tokens -= 1
+                    self.in_flight += 1
+                    return
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter_key(url, api_key):
+    host = urlsplit(url).netloc.lower()
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return (host, key_hash)
+
+
+def get_limiter(url, api_key=""):
+    """
+    Get the process-wide limiter shared by every request to one host and key.
+
+    New limiters are configured from the MAI_RATE_LIMIT_RPS,
+    MAI_RATE_LIMIT_BURST and MAI_MAX_IN_FLIGHT environment variables.
+
+    Args:
+        url: Any url on the target host
+        api_key: The api key sent with the request
+
+    Returns:
+        RateLimiter: The shared limiter
+    """
+    key = _limiter_key(url, api_key)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(
+                rate=float(os.environ.get("MAI_RATE_LIMIT_RPS", "0")),
+                burst=int(os.environ.get("MAI_RATE_LIMIT_BURST", "1")),
+                max_in_flight=int(os.environ.get("MAI_MAX_IN_FLIGHT", "16")),
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def configure_limiter(url, api_key="", rate=0.0, burst=1, max_in_flight=0):
+    """
+    Set the limits for one host and key, replacing the environment defaults.
+    """
+    with _limiters_lock:
+        _limiters[_limiter_key(url, api_key)] = RateLimiter(
+            rate=rate, burst=burst, max_in_flight=max_in_flight
+        )
+
+
+def check_interrupted():
+    """
+    Raise ComfyUI's InterruptProcessingException if the user cancelled.
+
+    The interrupt flag is left set, so every request of the cancelled prompt
+    (including those running on other threads) stops as well. ComfyUI clears
+    it when the next prompt starts.
+    """
+    if model_management is not None and model_management.processing_interrupted():
+        raise model_management.InterruptProcessingException()
+
+
+def sleep(seconds):
+    """
+    time.sleep that returns early by raising when the prompt is interrupted.
+    """
+    deadline = time.monotonic() + seconds
+    while True:
+        check_interrupted()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(INTERRUPT_POLL, remaining))
+
+
+_tracking = threading.local()
+
+
+class _HeldConnections:
+    # The connections a request holds right now. The lock keeps an interrupt
+    # from shutting down a connection that is being returned to the pool,
+    # where another request may pick it up (e.g. after a redirect).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conns = []
+
+    def shutdown(self):
+        with self.lock:
+            for conn in self.conns:
+                sock = getattr(conn, "sock", None)
+                if sock is not None:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+
+
+class _TrackingPoolMixin:
+    # Remembers which connections the current request has checked out, so an
+    # interrupt can shut their sockets down while the request is blocked.
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        held = getattr(_tracking, "held", None)
+        if held is not None:
+            with held.lock:
+                held.conns.append(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        held = getattr(_tracking, "held", None)
+        if held is not None:
+            with held.lock:
+                if conn in held.conns:
+                    held.conns.remove(conn)
+        super()._put_conn(conn)
+
+
+class _TrackingHTTPConnectionPool(_TrackingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackingHTTPSConnectionPool(_TrackingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _InterruptibleAdapter(requests.adapters.HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackingHTTPConnectionPool,
+            "https": _TrackingHTTPSConnectionPool,
+        }
+
+
+_request_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="mai-http")
+
+
+def _send_interruptible(session, method, url, kwargs):
+    held = _HeldConnections()
+
+    def send():
+        _tracking.held = held
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            _tracking.held = None
+
+    future = _request_pool.submit(send)
+    while True:
+        try:
+            return future.result(timeout=INTERRUPT_POLL)
+        except FutureTimeout:
+            pass
+        try:
+            check_interrupted()
+        except Exception:
+            # Unblock the sending thread right away instead of letting it
+            # wait for the upstream to finish.
+            held.shutdown()
+            raise
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
+    """
+    Get the process-wide session for a host, so connections are pooled and
+    reused across requests and nodes.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc.lower())
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = _InterruptibleAdapter(pool_maxsize=32)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return session
+
+
+_ENDPOINT_SEPARATOR = re.compile(r"\s+|,\s*(?=[A-Za-z][A-Za-z0-9+.-]*://)")
+
+
+def split_endpoints(url):
+    """
+    Split a url input into its endpoints.
+
+    A url input may list several equivalent endpoints (replicas of the same
+    proxy), separated by whitespace or by commas followed by a scheme, so a
+    comma inside a url (such as "?ids=1,2") does not split it.
+
+    Returns:
+        list: The endpoint urls
+    """
+    return [u for u in _ENDPOINT_SEPARATOR.split(url.strip()) if u]
+
+
+class EndpointBalancer:
+    """
+    Spreads requests over equivalent endpoints.
+
+    Endpoints are ranked by EWMA latency times (outstanding requests + 1), so
+    a busy or slow replica gets less traffic; endpoints without a latency
+    sample yet are tried first. An endpoint that could not be reached is
+    ranked last for cooldown seconds.
+
+    Args:
+        endpoints: The endpoint urls
+        decay: Weight of the newest latency sample in the EWMA
+        cooldown: Seconds an unreachable endpoint is avoided
+    """
+
+    def __init__(self, endpoints, decay=0.3, cooldown=10.0):
+        self.endpoints = list(endpoints)
+        self.decay = decay
+        self.cooldown = cooldown
+        self._outstanding = {e: 0 for e in self.endpoints}
+        self._ewma = {e: 0.0 for e in self.endpoints}
+        self._down_until = {e: 0.0 for e in self.endpoints}
+        self._lock = threading.Lock()
+
+    def order(self):
+        """
+        Returns:
+            list: The endpoints, best candidate first
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Ties keep the configured order, so the choice is reproducible
+            ranked = sorted(
+                enumerate(self.endpoints),
+                key=lambda item: (
+                    self._down_until[item[1]] > now,
+                    (self._outstanding[item[1]] + 1) * self._ewma[item[1]],
+                    self._outstanding[item[1]],
+                    item[0],
+                ),
+            )
+            return [endpoint for _, endpoint in ranked]
+
+    def start(self, endpoint):
+        with self._lock:
+            self._outstanding[endpoint] += 1
+
+    def finish(self, endpoint, elapsed=None, failed=False):
+        with self._lock:
+            self._outstanding[endpoint] -= 1
+            if failed:
+                self._down_until[endpoint] = time.monotonic() + self.cooldown
+            elif elapsed is not None:
+                ewma = self._ewma[endpoint] or elapsed
+                self._ewma[endpoint] = self.decay * elapsed + (1 - self.decay) * ewma
+
+
+_balancers = {}
+_balancers_lock = threading.Lock()
+
+
+def get_balancer(endpoints):
+    """
+    Get the shared balancer of a set of endpoints.
+    """
+    key = tuple(endpoints)
+    with _balancers_lock:
+        if key not in _balancers:
+            _balancers[key] = EndpointBalancer(endpoints)
+        return _balancers[key]
+
+
+def prewarm(url):
+    """
+    Open a pooled connection (DNS, TCP and TLS) to the host of url in the
+    background, so the first real request can reuse it. Every endpoint of a
+    multi-endpoint url is pre-warmed.
+    """
+    endpoints = split_endpoints(url)
+    if len(endpoints) > 1:
+        for endpoint in endpoints:
+            prewarm(endpoint)
+        return
+
+    def connect():
+        try:
+            adapter = get_session(url).get_adapter(url)
+            # Use the same pool (keyed by TLS settings) as a real request
+            if hasattr(adapter, "get_connection_with_tls_context"):
+                prepared = requests.Request("GET", url).prepare()
+                pool = adapter.get_connection_with_tls_context(prepared, verify=True)
+            else:
+                pool = adapter.get_connection(url)
+            conn = pool._get_conn()
+            # An idle pooled connection is already warm
+            if conn.sock is None:
+                conn.connect()
+            pool._put_conn(conn)
+        except Exception as e:
+            print(f"[mAI] Could not pre-warm {urlsplit(url).netloc}: {e}")
+
+    threading.Thread(target=connect, daemon=True).start()
+
+
+def _rewind_files(files):
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+
+def _is_connect_error(e):
+    # Nothing was sent yet, so even a POST can safely go to another endpoint
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def request(method, url, priority=INTERACTIVE, max_retries=3, **kwargs):
+    """
+    Send a request through the shared limiter of its host and api key.
+
+    A 429 response is retried up to max_retries times, honoring Retry-After.
+    Waiting for the response, and between retries, stops within
+    INTERRUPT_POLL seconds when the ComfyUI prompt is interrupted.
+    When MAI_HTTP_MODE is set, responses are recorded to or replayed from a
+    trace directory (see replay_helpers.get_transport).
+
+    If url is a list of several equivalent endpoints (nodes build it from
+    their url input with split_endpoints), each request goes to the best one
+    by EndpointBalancer. When an endpoint cannot be reached
+    the next one is tried; requests other than GET only fail over if the
+    connection was never established. response.url tells which endpoint
+    answered.
+
+    Args:
+        method: The HTTP method
+        url: The target url, or a list of equivalent endpoint urls
+        priority: INTERACTIVE or BATCH
+        max_retries: How often to retry a 429 response
+        **kwargs: Passed through to requests.Session.request
+
+    Returns:
+        requests.Response: The response
+    """
+    if isinstance(url, str):
+        return _request_endpoint(method, url, priority, max_retries, kwargs)
+    endpoints = list(url)
+    if len(endpoints) == 1:
+        return _request_endpoint(method, endpoints[0], priority, max_retries, kwargs)
+
+    balancer = get_balancer(endpoints)
+    last_error = None
+    for endpoint in balancer.order():
+        balancer.start(endpoint)
+        started = time.monotonic()
+        try:
+            response = _request_endpoint(
+                method, endpoint, priority, max_retries, kwargs
+            )
+        except requests.exceptions.ConnectionError as e:
+            balancer.finish(endpoint, failed=True)
+            if method.upper() != "GET" and not _is_connect_error(e):
+                raise
+            print(f"[mAI] {urlsplit(endpoint).netloc} unreachable, failing over")
+            last_error = e
+            _rewind_files(kwargs.get("files"))
+            continue
+        except BaseException:
+            balancer.finish(endpoint)
+            raise
+        balancer.finish(endpoint, time.monotonic() - started)
+        return response
+
+    raise last_error
+
+
+def _request_endpoint(method, url, priority, max_retries, kwargs):
+    transport = get_transport()
+    if transport is not None and transport.mode == REPLAY:
+        return transport.replay(method, url, kwargs)
+
+    api_key = (kwargs.get("headers") or {}).get("x-api-key", "")
+    limiter = get_limiter(url, api_key)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire(priority)
+        try:
+            started = time.monotonic()
+            response = _send_interruptible(get_session(url), method, url, kwargs)
+            elapsed = time.monotonic() - started
+        finally:
+            limiter.release()
+
+        # Rate-limited attempts are retried, so only the final answer is kept
+        recording = transport is not None and transport.mode == RECORD
+        if recording and response.status_code != 429:
+            transport.record(method, url, kwargs, response, elapsed)
+
+        if response.status_code != 429 or attempt == max_retries:
+            return response
+
+        try:
+            delay = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            delay = 2.0**attempt
+        print(f"[mAI] 429 from {urlsplit(url).netloc}, retrying in {delay:.1f}s")
+        sleep(delay)
+        _rewind_files(kwargs.get("files"))
+
+    return response
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def map_concurrent(fn, items, max_workers=8):
+    """
+    Call fn on every item concurrently, keeping failures per item.
+
+    Items are pulled from the iterable only as calls finish, so at most
+    max_workers of them are held at once; a generator of large items (such
+    as decoded frames) is never materialized in full.
+
+    Args:
+        fn: A callable taking one item
+        items: The items, any iterable
+        max_workers: The maximum number of concurrent calls
+
+    Returns:
+        list: fn's result, or the raised exception, for every item in order
+    """
+
+    def call(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            if model_management is not None and isinstance(
+                e, model_management.InterruptProcessingException
+            ):
+                raise
+            return e
+
+    max_workers = max(1, max_workers)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        for index, item in enumerate(items):
+            pending[pool.submit(call, item)] = index
+            del item
+            # Wait for a free slot before pulling the next item
+            if len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+        for future, index in pending.items():
+            results[index] = future.result()
+    return [results[index] for index in range(len(results))]
@@ -1,7 +1,118 @@
+import io
+import mmap
+import hashlib
+import threading
 import torch
-from PIL import Image
+from PIL import Image, ImageOps
 import numpy as np
 
+_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+_EXIF_ORIENTATION = 0x0112
+
+# Formats that are uploaded as-is, keyed by PIL format name
+ENCODED_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# For targets that only take JPEG and PNG (Veo, the vision proxy)
+JPEG_PNG_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png"}
+_pinned = threading.local()
+
+
+def _frame_to_hwc(frame):
+    if frame.dim() == 2:
+        return frame.unsqueeze(-1)
+    if frame.shape[0] <= 4 and frame.shape[-1] > 4:
+        return frame.permute(1, 2, 0)
+    return frame
+
+
+def _quantize(frame):
+    return frame.mul(255.0).clamp(0, 255).to(torch.uint8)
+
+
+def _pinned_buffers(shape, count=3):
+    # Reused across calls on the same thread, so steady-state uploads do not
+    # pay for page-locked allocations.
+    buffers = getattr(_pinned, "buffers", None)
+    if buffers is None or buffers[0].shape != shape:
+        buffers = [
+            torch.empty(shape, dtype=torch.uint8, pin_memory=True)
+            for _ in range(count)
+        ]
+        _pinned.buffers = buffers
+    return buffers
+
+
+def iter_uint8_frames(tensor):
+    """
+    Yield the frames of a ComfyUI IMAGE tensor as HWC uint8 numpy arrays.
+
+    Frames are quantized to uint8 on the tensor's device before they are
+    copied to the host. For CUDA tensors the copy of the next frame runs
+    asynchronously into a pinned buffer while the caller works on the
+    current one.
+
+    Args:
+        tensor: A torch.Tensor with one frame (HWC/CHW) or a batch (BHWC)
+
+    Yields:
+        numpy.ndarray: A uint8 HWC frame, only valid until the next frame
+        is requested
+
+    Raises:
+        TypeError: If tensor is not a torch.Tensor
+    """
+    if not isinstance(tensor, torch.Tensor):
+        raise TypeError(f"Expected torch.Tensor but got {type(tensor)}")
+
+    frames = [tensor] if tensor.dim() < 4 else list(tensor)
+
+    if not tensor.is_cuda:
+        for frame in frames:
+            yield _quantize(_frame_to_hwc(frame)).numpy()
+        return
+
+    buffers = _pinned_buffers(_frame_to_hwc(frames[0]).shape)
+    events = [None] * len(buffers)
+
+    def start(i):
+        slot = i % len(buffers)
+        buffers[slot].copy_(_quantize(_frame_to_hwc(frames[i])), non_blocking=True)
+        events[slot] = torch.cuda.Event()
+        events[slot].record()
+
+    start(0)
+    for i in range(len(frames)):
+        if i + 1 < len(frames):
+            start(i + 1)
+        slot = i % len(buffers)
+        events[slot].synchronize()
+        yield buffers[slot].numpy()
+
+
+def iter_pil_frames(tensor):
+    """
+    Yield the frames of a ComfyUI IMAGE tensor as PIL Images.
+
+    Args:
+        tensor: A torch.Tensor with one frame (HWC/CHW) or a batch (BHWC)
+
+    Yields:
+        PIL.Image: A PIL Image object per frame
+
+    Raises:
+        TypeError: If tensor is not a torch.Tensor
+        ValueError: If tensor has an unexpected channel count
+    """
+    for image_np in iter_uint8_frames(tensor):
+        channels = image_np.shape[2]
+        if channels not in _MODES:
+            raise ValueError(f"Unexpected channel count: {channels}")
+
+        # frombytes copies, so the image outlives the reused transfer buffer
+        height, width = image_np.shape[:2]
+        yield Image.frombytes(
+            _MODES[channels], (width, height), np.ascontiguousarray(image_np)
+        )
+
 
 def to_pil(tensor):
     """
@@ -23,16 +134,193 @@ def to_pil(tensor):
     if tensor.dim() == 4:
         tensor = tensor[0]
 
-    if tensor.shape[0] <= 4:
-        tensor = tensor.permute(1, 2, 0)
+    return next(iter_pil_frames(tensor))
+
+
+def image_data_entries(data):
+    """
+    Normalize the "data" field of an image response.
+
+    The proxy returns a bare base64 string for a single image and a list (of
+    strings or {"b64_json", "revised_prompt"} objects) when n > 1.
+
+    Args:
+        data: The "data" field of the response
+
+    Returns:
+        list: (base64 string, revised prompt or None) per image
+    """
+    if isinstance(data, (str, dict)):
+        data = [data]
+    entries = []
+    for entry in data:
+        if isinstance(entry, dict):
+            entries.append((entry.get("b64_json"), entry.get("revised_prompt")))
+        else:
+            entries.append((entry, None))
+    return entries
+
+
+def dedupe_images(images):
+    """
+    Drop repeated PIL images while remembering where each one came from.
+
+    Args:
+        images: A list of PIL Images
+
+    Returns:
+        tuple: (unique, order) where unique holds the first occurrence of each
+        distinct image and order[i] is the index in unique of images[i]
+    """
+    seen = {}
+    unique = []
+    order = []
+    for img in images:
+        h = hashlib.sha256(f"{img.mode}{img.size}".encode("utf-8"))
+        h.update(img.tobytes())
+        digest = h.digest()
+        if digest not in seen:
+            seen[digest] = len(unique)
+            unique.append(img)
+        order.append(seen[digest])
+    return unique, order
+
+
+def apply_in_mask(image, mask, adjust):
+    """
+    Apply an adjustment only inside the mask of every frame of a batch.
+
+    Each frame is cropped to the bounding box of its mask, adjusted and
+    blended back using the mask as weight. Frames with an empty mask are
+    left untouched and never reach adjust.
 
-    image_np = (tensor.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
-    modes = {1: "L", 3: "RGB", 4: "RGBA"}
-    channels = image_np.shape[2]
+    Args:
+        image: A ComfyUI IMAGE tensor (BHWC)
+        mask: A ComfyUI MASK tensor (BHW or HW), repeated over the batch if
+            it has fewer frames than image
+        adjust: A callable (region, frame) -> adjusted region, where region
+            is the 1CHW crop and frame is the full 1HWC frame it came from
+
+    Returns:
+        torch.Tensor: The adjusted IMAGE tensor
+    """
+    if mask.dim() == 2:
+        mask = mask.unsqueeze(0)
+
+    if tuple(mask.shape[-2:]) != tuple(image.shape[1:3]):
+        mask = torch.nn.functional.interpolate(
+            mask.unsqueeze(1).float(),
+            size=tuple(image.shape[1:3]),
+            mode="bilinear",
+            align_corners=False,
+        ).squeeze(1)
+    mask = mask.to(device=image.device, dtype=image.dtype)
+
+    out = image.clone()
+    for i in range(image.shape[0]):
+        frame_mask = mask[i % mask.shape[0]]
+        active = frame_mask > 0
+        rows = torch.nonzero(active.any(dim=1))
+        if rows.numel() == 0:
+            continue
+        cols = torch.nonzero(active.any(dim=0))
+        y0, y1 = rows[0].item(), rows[-1].item() + 1
+        x0, x1 = cols[0].item(), cols[-1].item() + 1
 
-    if channels not in modes:
-        raise ValueError(f"Unexpected channel count: {channels}")
+        region = image[i, y0:y1, x0:x1]
+        adjusted = adjust(region.permute(2, 0, 1).unsqueeze(0), image[i : i + 1])
+        adjusted = adjusted.squeeze(0).permute(1, 2, 0)
+        weight = frame_mask[y0:y1, x0:x1].unsqueeze(-1)
+        out[i, y0:y1, x0:x1] = region + (adjusted - region) * weight
+
+    return out
+
+
+def stack_images(tensors):
+    """
+    Concatenate IMAGE tensors into one batch, resizing every tensor whose
+    frames differ in size from the first one.
+
+    Args:
+        tensors: A list of ComfyUI IMAGE tensors (BHWC)
+
+    Returns:
+        torch.Tensor: One BHWC batch
+    """
+    height, width = tensors[0].shape[1:3]
+    resized = []
+    for tensor in tensors:
+        if tuple(tensor.shape[1:3]) != (height, width):
+            tensor = torch.nn.functional.interpolate(
+                tensor.permute(0, 3, 1, 2),
+                size=(height, width),
+                mode="bilinear",
+                align_corners=False,
+            ).permute(0, 2, 3, 1)
+        resized.append(tensor)
+    return torch.cat(resized, dim=0)
+
+
+def load_encoded_image(path):
+    """
+    Memory-map an image file without decoding its pixels.
+
+    Only the header is parsed, for the format and size.
+
+    Args:
+        path: The image file
+
+    Returns:
+        dict: An ENCODED_IMAGE with path, format, mime_type, width, height,
+        orientation (EXIF), sha256 and data (a read-only mmap of the file)
+    """
+    with Image.open(path) as img:
+        image_format = img.format
+        width, height = img.size
+        orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return {
+        "path": path,
+        "format": image_format,
+        "mime_type": ENCODED_MIME_TYPES.get(image_format, ""),
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "data": data,
+    }
+
+
+def encoded_image_bytes(encoded, accepted=ENCODED_MIME_TYPES, fallback="JPEG"):
+    """
+    Get the bytes to upload for an ENCODED_IMAGE.
+
+    The original file bytes are used when the format is accepted and the
+    pixels need no EXIF rotation; otherwise the image is decoded once and
+    re-encoded to fallback.
+
+    Args:
+        encoded: An ENCODED_IMAGE from load_encoded_image
+        accepted: PIL format names the target accepts, mapped to mime types
+        fallback: The PIL format to re-encode to
+
+    Returns:
+        tuple: (bytes-like data, mime type, file extension)
+    """
+    if encoded["format"] in accepted and encoded["orientation"] == 1:
+        encoded["data"].seek(0)
+        return (
+            encoded["data"],
+            accepted[encoded["format"]],
+            encoded["format"].lower(),
+        )
 
-    return Image.fromarray(
-        image_np[..., 0] if channels == 1 else image_np, mode=modes[channels]
-    )
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(encoded["data"])))
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format=fallback)
+    return buf.getvalue(), ENCODED_MIME_TYPES[fallback], fallback.lower()
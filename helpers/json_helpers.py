@@ -0,0 +1,90 @@
+import json
+import base64
+
+# Raw bytes per base64 chunk; a multiple of 3 so chunks concatenate cleanly.
+CHUNK_SIZE = 3 * 64 * 1024
+
+
+class Base64Part:
+    """
+    Raw bytes that are base64-encoded only while the request body is sent.
+
+    Pass encoded=True for data that is already base64 (for example from the
+    process-pool encoder); it is then sent as is.
+    """
+
+    def __init__(self, data, encoded=False):
+        self.data = memoryview(data)
+        self.encoded = encoded
+
+    def __len__(self):
+        # Encoded length including the surrounding JSON quotes
+        if self.encoded:
+            return len(self.data) + 2
+        return 4 * ((len(self.data) + 2) // 3) + 2
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        yield b'"'
+        for start in range(0, len(self.data), chunk_size):
+            chunk = self.data[start : start + chunk_size]
+            yield bytes(chunk) if self.encoded else base64.b64encode(chunk)
+        yield b'"'
+
+
+class JsonBody:
+    """
+    A JSON request body that streams its Base64Part values chunk by chunk.
+
+    The payload is serialized as usual except for Base64Part values, so peak
+    memory is one copy of the raw image bytes plus one chunk, instead of the
+    base64 string, the payload dict and the serialized body all at once.
+    The body knows its length, so requests sends it with a Content-Length
+    header, and it can be iterated again for retries.
+
+    Args:
+        payload: A JSON-serializable object that may contain Base64Part values
+    """
+
+    def __init__(self, payload):
+        self._segments = []
+        self._pending = []
+        self._flatten(payload)
+        self._flush()
+
+    def _emit(self, text):
+        self._pending.append(text)
+
+    def _flush(self):
+        if self._pending:
+            self._segments.append("".join(self._pending).encode("ascii"))
+            self._pending = []
+
+    def _flatten(self, value):
+        if isinstance(value, Base64Part):
+            self._flush()
+            self._segments.append(value)
+        elif isinstance(value, dict):
+            self._emit("{")
+            for i, (key, item) in enumerate(value.items()):
+                self._emit((", " if i else "") + json.dumps(str(key)) + ": ")
+                self._flatten(item)
+            self._emit("}")
+        elif isinstance(value, (list, tuple)):
+            self._emit("[")
+            for i, item in enumerate(value):
+                if i:
+                    self._emit(", ")
+                self._flatten(item)
+            self._emit("]")
+        else:
+            self._emit(json.dumps(value))
+
+    def __len__(self):
+        return sum(len(segment) for segment in self._segments)
+
+    def __iter__(self):
+        for segment in self._segments:
+            if isinstance(segment, Base64Part):
+                yield from segment.iter_chunks()
+            else:
+                yield segment
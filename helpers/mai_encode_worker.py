@@ -0,0 +1,47 @@
+"""
+Worker side of the process-pool encoder (see encode_helpers).
+
+Workers import this file under its top-level name, so it must only depend
+on the standard library, numpy and PIL, never on the node package.
+"""
+
+import io
+import base64
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from PIL import Image
+
+MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+
+
+def attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13 has no track argument and registers every attached
+    # segment with the resource tracker, which then reports it as leaked or
+    # unlinks it under the parent. The parent owns the segment, so skip it.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def png_b64(buffer, shape, compress_level):
+    frame = np.ndarray(shape, dtype=np.uint8, buffer=buffer)
+    mode = MODES[shape[2]]
+    img = Image.frombuffer(mode, (shape[1], shape[0]), frame, "raw", mode, 0, 1)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=compress_level)
+    return base64.b64encode(buf.getbuffer())
+
+
+def encode_shared(name, shape, compress_level):
+    shm = attach(name)
+    try:
+        return png_b64(shm.buf, shape, compress_level)
+    finally:
+        shm.close()
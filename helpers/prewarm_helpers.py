@@ -0,0 +1,36 @@
+from server import PromptServer
+from .http_helpers import prewarm
+
+# Node inputs that name a proxy endpoint
+URL_INPUTS = ("url", "batch_url")
+
+
+def _on_prompt(json_data):
+    # Open connections to every mAI node's url while earlier nodes run
+    try:
+        hosts = set()
+        for node in (json_data.get("prompt") or {}).values():
+            if not str(node.get("class_type", "")).startswith("Mai"):
+                continue
+            inputs = node.get("inputs") or {}
+            for name in URL_INPUTS:
+                url = inputs.get(name)
+                # Linked inputs are [node_id, output_index] and unknown until run
+                if isinstance(url, str) and url.strip():
+                    hosts.add(url.strip())
+        for url in hosts:
+            prewarm(url)
+    except Exception as e:
+        print(f"[mAI] Connection pre-warming failed: {e}")
+    return json_data
+
+
+def register_prewarm_hook():
+    """
+    Pre-open pooled connections to the proxies of every mAI node in a prompt
+    as soon as it is queued.
+    """
+    try:
+        PromptServer.instance.add_on_prompt_handler(_on_prompt)
+    except Exception as e:
+        print(f"[mAI] Could not register connection pre-warming: {e}")
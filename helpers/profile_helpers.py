@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import functools
+import threading
+import tracemalloc
+import torch
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; RSS is then read from /proc only
+    resource = None
+
+_MB = 1024 * 1024
+_lock = threading.Lock()
+# Profiles running now, and ever entered, to keep global peaks intact
+_active = 0
+_entered = 0
+# The profiler's own snapshots are not allocations of the node
+_SELF_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+def enabled():
+    return os.environ.get("MAI_MEMORY_PROFILE", "").strip().lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def describe_inputs(kwargs):
+    """
+    Summarize the tensor inputs of a node call.
+
+    Returns:
+        dict: name -> "shape dtype (MB)" for every tensor input
+    """
+    sizes = {}
+    for name, value in kwargs.items():
+        if isinstance(value, torch.Tensor):
+            size_mb = value.element_size() * value.nelement() / _MB
+            shape = "x".join(str(d) for d in value.shape)
+            sizes[name] = f"{shape} {str(value.dtype).replace('torch.', '')} "
+            sizes[name] += f"({size_mb:.1f} MB)"
+    return sizes
+
+
+class MemoryProfile:
+    """
+    Measures the memory used while a block runs.
+
+    Records the peak Python heap (tracemalloc, which includes numpy and PIL
+    buffers but not torch's CPU allocator), the process RSS delta and the
+    growth of the process peak RSS, and the CUDA allocator peak.
+
+    Allocation sites are reported twice: peak_sites from a snapshot taken
+    by a sampler thread whenever the heap reaches a new high while the block
+    runs, which catches transient buffers (such as base64 copies) freed
+    before it returns, and retained_sites from the snapshot at exit, which
+    only shows what the block kept. The sampler polls every sample_interval
+    seconds, so a peak shorter than that can be missed.
+
+    tracemalloc and CUDA peaks are process-wide. They are only reset when no
+    other profile is running; if blocks overlap (e.g. the headless thread
+    pool), the reported peaks cover the whole overlapping window and the
+    report is marked "overlapped".
+
+    Args:
+        top: How many allocation sites to keep
+        sample_interval: Seconds between heap samples
+    """
+
+    def __init__(self, top=5, sample_interval=0.02):
+        self.top = top
+        self.sample_interval = sample_interval
+        self.report = {}
+
+    def __enter__(self):
+        global _active, _entered
+        # Tracing is left on, so concurrent profiles never stop each other
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self._snapshot = tracemalloc.take_snapshot()
+        self._cuda = torch.cuda.is_available()
+        with _lock:
+            first = _active == 0
+            _active += 1
+            _entered += 1
+            self._entered = _entered
+            if first:
+                tracemalloc.reset_peak()
+                if self._cuda:
+                    torch.cuda.reset_peak_memory_stats()
+        self._overlapped = not first
+        self._heap_before = tracemalloc.get_traced_memory()[0]
+        self._rss_before = _rss_bytes()
+        self._max_rss_before = _max_rss_bytes()
+        if self._cuda:
+            self._cuda_before = torch.cuda.memory_allocated()
+
+        self._peak_sites = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._started = time.monotonic()
+        return self
+
+    def _sites(self, snapshot):
+        stats = snapshot.filter_traces(_SELF_FILTERS).compare_to(
+            self._snapshot, "lineno"
+        )
+        return [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+            f"+{stat.size_diff / _MB:.1f} MB"
+            for stat in stats[: self.top]
+            if stat.size_diff >= _MB / 10
+        ]
+
+    def _sample(self):
+        best = self._heap_before
+        while not self._stop.wait(self.sample_interval):
+            current = tracemalloc.get_traced_memory()[0]
+            # Only snapshot on a clear new high, as snapshots are not free
+            if current > best + max(_MB, (best - self._heap_before) // 10):
+                best = current
+                self._peak_sites = self._sites(tracemalloc.take_snapshot())
+
+    def __exit__(self, *exc):
+        global _active
+        elapsed = time.monotonic() - self._started
+        self._stop.set()
+        self._sampler.join()
+        heap_now, heap_peak = tracemalloc.get_traced_memory()
+        with _lock:
+            _active -= 1
+            overlapped = self._overlapped or _entered != self._entered
+
+        self.report = {
+            "seconds": round(elapsed, 3),
+            "heap_peak_mb": round((heap_peak - self._heap_before) / _MB, 1),
+            "heap_delta_mb": round((heap_now - self._heap_before) / _MB, 1),
+            "rss_delta_mb": round((_rss_bytes() - self._rss_before) / _MB, 1),
+            "rss_peak_growth_mb": round(
+                (_max_rss_bytes() - self._max_rss_before) / _MB, 1
+            ),
+            "peak_sites": self._peak_sites,
+            "retained_sites": self._sites(tracemalloc.take_snapshot()),
+        }
+        if self._cuda:
+            self.report["cuda_peak_mb"] = round(
+                (torch.cuda.max_memory_allocated() - self._cuda_before) / _MB, 1
+            )
+        if overlapped:
+            self.report["overlapped"] = True
+        return False
+
+
+def format_report(node_name, report):
+    lines = [
+        f"[memory] {node_name}: heap peak {report['heap_peak_mb']} MB, "
+        f"RSS {report['rss_delta_mb']:+} MB "
+        f"(peak +{report['rss_peak_growth_mb']} MB)"
+        + (
+            f", CUDA peak {report['cuda_peak_mb']} MB"
+            if "cuda_peak_mb" in report
+            else ""
+        )
+        + f", {report['seconds']}s"
+    ]
+    for name, size in report.get("inputs", {}).items():
+        lines.append(f"[memory]   input {name}: {size}")
+    if report.get("overlapped"):
+        lines.append("[memory]   peaks include other nodes running concurrently")
+    for site in report["peak_sites"]:
+        lines.append(f"[memory]   at peak: {site}")
+    for site in report["retained_sites"]:
+        lines.append(f"[memory]   retained: {site}")
+    return "\n".join(lines)
+
+
+def _publish(node_class, node_name, outputs, report):
+    text = format_report(node_name, report)
+    print(text)
+
+    log_path = os.environ.get("MAI_MEMORY_PROFILE_LOG", "").strip()
+    if log_path:
+        with _lock, open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"node": node_name, **report}) + "\n")
+
+    # Nodes with an info output carry the report alongside their own info
+    names = getattr(node_class, "RETURN_NAMES", ())
+    is_list = getattr(node_class, "OUTPUT_IS_LIST", ())
+    if "info" not in names or not isinstance(outputs, tuple):
+        return outputs
+    index = names.index("info")
+    if index < len(is_list) and is_list[index]:
+        return outputs
+    if not isinstance(outputs[index], str):
+        return outputs
+    info = f"{outputs[index]}\n{text}" if outputs[index] else text
+    return outputs[:index] + (info,) + outputs[index + 1 :]
+
+
+def profile_nodes(node_classes):
+    """
+    Wrap the FUNCTION of every node class with a MemoryProfile.
+
+    Only active when MAI_MEMORY_PROFILE is set. Every execution prints a
+    report, appends it to MAI_MEMORY_PROFILE_LOG (JSONL) if set, and adds it
+    to the node's info output if it has one. MAI_MEMORY_PROFILE_TOP sets how
+    many allocation sites are listed (default 5).
+
+    Args:
+        node_classes: NODE_CLASS_MAPPINGS
+    """
+    if not enabled():
+        return
+
+    top = int(os.environ.get("MAI_MEMORY_PROFILE_TOP", "5"))
+
+    for node_name, node_class in node_classes.items():
+        original = getattr(node_class, node_class.FUNCTION)
+        if getattr(original, "_mai_profiled", False):
+            continue
+
+        def wrapper(
+            self, *args, _original=original, _name=node_name, _cls=node_class, **kw
+        ):
+            with MemoryProfile(top) as profile:
+                outputs = _original(self, *args, **kw)
+            profile.report["inputs"] = describe_inputs(kw)
+            return _publish(_cls, _name, outputs, profile.report)
+
+        wrapper = functools.wraps(original)(wrapper)
+        wrapper._mai_profiled = True
+        setattr(node_class, node_class.FUNCTION, wrapper)
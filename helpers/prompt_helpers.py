@@ -1,6 +1,62 @@
+import re
+import hashlib
 from server import PromptServer
 
 
+def split_prompt_items(prompt):
+    """
+    Split a prompt into items separated by blank lines.
+
+    Single line breaks stay inside an item, so items can span several lines.
+
+    Args:
+        prompt: The prompt text
+
+    Returns:
+        list: The non-empty, stripped items
+    """
+    items = [p.strip() for p in re.split(r"\n\s*\n+", prompt.strip())]
+    return [p for p in items if p]
+
+
+def prompt_cache_key(model, system_prompt):
+    """
+    Derive a stable prompt-prefix cache key from the model and system prompt.
+
+    Calls that share both land on the same key, so the upstream can serve the
+    repeated prefix from its cache.
+
+    Args:
+        model: The model name
+        system_prompt: The system prompt / instructions
+
+    Returns:
+        str: The cache key
+    """
+    digest = hashlib.sha256(f"{model.strip()}\0{system_prompt}".encode("utf-8"))
+    return "mai-" + digest.hexdigest()[:32]
+
+
+def cached_token_count(data):
+    """
+    Read how many prompt tokens were served from the prefix cache.
+
+    Args:
+        data: The proxy's JSON response
+
+    Returns:
+        int: The cached token count (0 if the response does not report it)
+    """
+    usage = data.get("usage") or data.get("usageMetadata") or {}
+    details = usage.get("input_tokens_details") or {}
+    return int(
+        details.get("cached_tokens")
+        or usage.get("cachedContentTokenCount")
+        or usage.get("cached_tokens")
+        or 0
+    )
+
+
 class PromptSaverMixin:
     def save_content(self, content, node_class_name):
         """
@@ -0,0 +1,89 @@
+import random
+import threading
+from collections import deque
+
+
+class ProviderStats:
+    """
+    Rolling latency and timeout statistics per (provider, model).
+
+    Only the last `window` calls of each provider/model are kept, and a
+    small share of calls (explore_rate) still goes to unhealthy providers, so
+    a provider that recovers is picked up again once its bad calls age out.
+    """
+
+    def __init__(
+        self, window=50, min_samples=5, max_timeout_rate=0.3, explore_rate=0.05
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_timeout_rate = max_timeout_rate
+        self.explore_rate = explore_rate
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, latency_ms, timed_out):
+        with self._lock:
+            calls = self._calls.setdefault(
+                (provider, model), deque(maxlen=self.window)
+            )
+            calls.append((latency_ms, bool(timed_out)))
+
+    def _summary(self, provider, model):
+        calls = list(self._calls.get((provider, model), ()))
+        if not calls:
+            return 0, 0.0, []
+        timeout_rate = sum(1 for _, t in calls if t) / len(calls)
+        latencies = sorted(latency for latency, t in calls if not t)
+        return len(calls), timeout_rate, latencies
+
+    def _percentile(self, values, q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def choose(self, providers, model):
+        """
+        Pick the provider to use for model.
+
+        Providers with fewer than min_samples calls are tried first. After
+        that, the healthy provider (timeout rate at most max_timeout_rate)
+        with the lowest median latency wins. If none is healthy, the one
+        with the lowest timeout rate is used.
+
+        Returns:
+            str: The chosen provider
+        """
+        with self._lock:
+            summaries = {p: self._summary(p, model) for p in providers}
+
+        for provider, (count, _, _) in summaries.items():
+            if count < self.min_samples:
+                return provider
+
+        healthy = [
+            (self._percentile(latencies, 0.5), provider)
+            for provider, (_, timeout_rate, latencies) in summaries.items()
+            if timeout_rate <= self.max_timeout_rate and latencies
+        ]
+        unhealthy = [p for p in providers if p not in {h[1] for h in healthy}]
+        if healthy and unhealthy and random.random() < self.explore_rate:
+            return random.choice(unhealthy)
+        if healthy:
+            return min(healthy)[1]
+        return min(providers, key=lambda p: summaries[p][1])
+
+    def tune_timeout(self, provider, model, default_ms, floor_ms=1000):
+        """
+        Derive timeout_ms from the observed p95 latency of a provider/model.
+
+        Returns 1.5x the p95 of successful calls, clamped between floor_ms
+        and default_ms, or default_ms while there are too few samples.
+        """
+        with self._lock:
+            _, _, latencies = self._summary(provider, model)
+        if len(latencies) < self.min_samples:
+            return default_ms
+        p95 = self._percentile(latencies, 0.95)
+        return int(max(floor_ms, min(default_ms, p95 * 1.5)))
+
+
+provider_stats = ProviderStats()
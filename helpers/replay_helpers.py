@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+def fingerprint(method, url, kwargs):
+    """
+    Hash what identifies a request: method, url, query, form fields, files
+    and body. Headers (and therefore api keys) are not part of it.
+
+    Args:
+        method: The HTTP method
+        url: The target url
+        kwargs: The keyword arguments passed to requests.request
+
+    Returns:
+        str: A hex digest
+    """
+    h = hashlib.sha256(f"{method.upper()} {url}".encode("utf-8"))
+
+    for name in ("params", "json"):
+        if kwargs.get(name) is not None:
+            h.update(json.dumps(kwargs[name], sort_keys=True).encode("utf-8"))
+
+    data = kwargs.get("data")
+    if isinstance(data, dict):
+        h.update(json.dumps(data, sort_keys=True, default=str).encode("utf-8"))
+    elif isinstance(data, (bytes, str)):
+        h.update(data.encode("utf-8") if isinstance(data, str) else data)
+    elif data is not None:
+        # Streaming bodies (JsonBody) can be iterated again by the real send
+        for chunk in data:
+            h.update(chunk)
+
+    for name, value in sorted((kwargs.get("files") or {}).items()):
+        fileobj = value[1] if isinstance(value, tuple) else value
+        h.update(name.encode("utf-8"))
+        if hasattr(fileobj, "read"):
+            fileobj.seek(0)
+            h.update(fileobj.read())
+            fileobj.seek(0)
+        else:
+            h.update(fileobj)
+
+    return h.hexdigest()
+
+
+class Transport:
+    """
+    Records responses of the shared HTTP path to a trace directory, or
+    serves them back from it.
+
+    Every fingerprint keeps a list of recordings. Replay serves them in order
+    and keeps serving the last one, sleeping for the recorded latency
+    multiplied by latency_scale.
+    """
+
+    def __init__(self, mode, trace_dir, latency_scale=1.0):
+        self.mode = mode
+        self.trace_dir = trace_dir
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._cursor = {}
+        os.makedirs(trace_dir, exist_ok=True)
+
+    def _index_path(self, fp):
+        return os.path.join(self.trace_dir, f"{fp}.json")
+
+    def _load(self, fp):
+        try:
+            with open(self._index_path(fp), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def record(self, method, url, kwargs, response, elapsed):
+        fp = fingerprint(method, url, kwargs)
+        with self._lock:
+            entries = self._load(fp)
+            body_name = f"{fp}.{len(entries)}.bin"
+            with open(os.path.join(self.trace_dir, body_name), "wb") as f:
+                f.write(response.content)
+            entries.append(
+                {
+                    "method": method.upper(),
+                    "url": url,
+                    "status": response.status_code,
+                    "headers": dict(response.headers),
+                    "elapsed": elapsed,
+                    "body": body_name,
+                    "body_size": len(response.content),
+                    "recorded_at": time.time(),
+                }
+            )
+            with open(self._index_path(fp), "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+
+    def replay(self, method, url, kwargs):
+        fp = fingerprint(method, url, kwargs)
+        with self._lock:
+            entries = self._load(fp)
+            if not entries:
+                raise requests.exceptions.ConnectionError(
+                    f"[REPLAY] No recording for {method.upper()} {url} ({fp[:12]})"
+                )
+            cursor = self._cursor.get(fp, 0)
+            self._cursor[fp] = cursor + 1
+            entry = entries[min(cursor, len(entries) - 1)]
+
+        with open(os.path.join(self.trace_dir, entry["body"]), "rb") as f:
+            content = f.read()
+
+        time.sleep(entry["elapsed"] * self.latency_scale)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        # The body is stored decoded, so it must not be decoded again
+        response.headers.pop("Content-Encoding", None)
+        response._content = content
+        response.url = url
+        response.elapsed = datetime.timedelta(seconds=entry["elapsed"])
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers
+        )
+        return response
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Get the record/replay transport configured by the environment.
+
+    MAI_HTTP_MODE selects "record" or "replay", MAI_HTTP_TRACE_DIR the trace
+    directory (default ./mai_http_trace) and MAI_HTTP_LATENCY_SCALE scales
+    replayed latency (default 1.0, 0 replays without delay).
+
+    Returns:
+        Transport: The transport, or None for normal network access
+    """
+    global _transport
+    mode = os.environ.get("MAI_HTTP_MODE", "").strip().lower()
+    if mode not in (RECORD, REPLAY):
+        return None
+    with _transport_lock:
+        if _transport is None or _transport.mode != mode:
+            _transport = Transport(
+                mode,
+                os.environ.get("MAI_HTTP_TRACE_DIR", "mai_http_trace"),
+                float(os.environ.get("MAI_HTTP_LATENCY_SCALE", "1.0")),
+            )
+        return _transport
@@ -0,0 +1,224 @@
+import io
+import json
+import time
+import torch
+from . import http_helpers
+from .image_helpers import to_pil, encoded_image_bytes, JPEG_PNG_MIME_TYPES
+from comfy.utils import ProgressBar
+from comfy_api.input_impl.video_types import VideoFromFile
+
+
+def build_veo_request(
+    user_prompt,
+    negative_prompt,
+    aspectRatio,
+    resizeMode,
+    resolution,
+    durationSeconds,
+    image=None,
+    encoded_image=None,
+):
+    """
+    Build the form fields and files of a Veo render request.
+
+    Args:
+        image: The start frame as an IMAGE tensor
+        encoded_image: The start frame as an ENCODED_IMAGE, uploaded as is
+
+    Returns:
+        tuple: (data, files) for http_helpers.post
+    """
+    if encoded_image is not None:
+        # Upload the original file bytes instead of decoding and
+        # re-encoding them. Veo only takes JPEG and PNG; anything else is
+        # re-encoded to JPEG, which is what the tensor path sends.
+        image_data, mime_type, ext = encoded_image_bytes(
+            encoded_image, accepted=JPEG_PNG_MIME_TYPES
+        )
+        image_file = (f"image.{ext}", image_data, mime_type)
+    else:
+        # Convert the incoming ComfyUI tensor to a valid PIL image
+        pil_image = to_pil(image)
+
+        # Save as JPEG in memory
+        image_bytes = io.BytesIO()
+        pil_image.save(image_bytes, format="JPEG")
+        image_bytes.seek(0)
+        image_file = ("image.jpg", image_bytes, "image/jpeg")
+
+    data = {
+        "prompt": user_prompt,
+        "params": json.dumps(
+            {
+                "negative_prompt": negative_prompt,
+                "aspectRatio": aspectRatio,
+                "resizeMode": resizeMode,
+                "resolution": resolution,
+                "durationSeconds": durationSeconds,
+            }
+        ),
+    }
+    return data, {"file": image_file}
+
+
+def submit_veo_job(url, headers, data, files, timeout=60):
+    """
+    Submit a Veo render to the proxy without waiting for the video.
+
+    Args:
+        url: The proxy endpoint, or a list of equivalent endpoints
+        headers: Request headers (including x-api-key)
+        data: Form fields of the render request
+        files: Multipart files of the render request
+        timeout: Seconds to wait for the submission to be acknowledged
+
+    Returns:
+        dict: A job handle that poll_veo_job can resolve. If the proxy
+        finished the render synchronously, the handle already carries the
+        video_url. The handle holds no credentials; the headers are passed
+        to poll_veo_job again.
+
+    Raises:
+        RuntimeError: If the proxy returned neither a job id nor a video url
+    """
+    response = http_helpers.post(
+        url,
+        headers=headers,
+        data={**data, "async": "true"},
+        files=files,
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    result_json = response.json()
+
+    job_id = result_json.get("jobId") or result_json.get("id") or ""
+    video_url = result_json.get("url") or ""
+
+    if not job_id and not video_url.strip():
+        raise RuntimeError("[ERROR] Proxy returned no job id.")
+    if video_url.strip():
+        # The download host usually differs from the proxy
+        http_helpers.prewarm(video_url)
+
+    # With several endpoints the job lives on the one that accepted it
+    served_url = response.url or (url if isinstance(url, str) else url[0])
+    return {
+        "url": served_url,
+        "job_id": job_id,
+        "status_url": result_json.get("statusUrl")
+        or f"{served_url.rstrip('/')}/{job_id}",
+        "video_url": video_url,
+    }
+
+
+def poll_veo_job(
+    job,
+    headers,
+    timeout=900,
+    initial_delay=2.0,
+    max_delay=15.0,
+    backoff=1.5,
+    progress=True,
+):
+    """
+    Poll a submitted Veo job with exponential backoff until it finishes.
+
+    Args:
+        job: The handle returned by submit_veo_job
+        headers: Request headers (including x-api-key)
+        timeout: Overall seconds to wait before giving up
+        initial_delay: Seconds before the first status check
+        max_delay: Upper bound for the delay between status checks
+        backoff: Multiplier applied to the delay after every check
+        progress: Whether to report the job progress to the ComfyUI progress bar
+
+    Returns:
+        str: The url of the rendered video
+
+    Raises:
+        RuntimeError: If the job failed or did not finish within the timeout
+    """
+    if job.get("video_url"):
+        return job["video_url"]
+
+    pbar = ProgressBar(100) if progress else None
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+
+    while time.monotonic() < deadline:
+        http_helpers.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        delay = min(delay * backoff, max_delay)
+
+        response = http_helpers.get(job["status_url"], headers=headers, timeout=30)
+        response.raise_for_status()
+        status_json = response.json()
+        status = str(status_json.get("status", "")).lower()
+
+        if pbar is not None and status_json.get("progress") is not None:
+            pbar.update_absolute(int(float(status_json["progress"])), 100)
+
+        if status in ("failed", "error", "cancelled"):
+            raise RuntimeError(
+                f"[ERROR] Veo job {job['job_id']} failed: "
+                + str(status_json.get("error") or status)
+            )
+
+        video_url = status_json.get("url") or ""
+        if status in ("done", "succeeded", "completed") or video_url.strip():
+            if not video_url.strip():
+                raise RuntimeError("[ERROR] Empty response.")
+            if pbar is not None:
+                pbar.update_absolute(100, 100)
+            http_helpers.prewarm(video_url)
+            job["video_url"] = video_url
+            return video_url
+
+    raise RuntimeError(f"[ERROR] Veo job {job['job_id']} timed out after {timeout}s.")
+
+
+def download_veo_video(video_url, timeout=400):
+    """
+    Download a rendered Veo video.
+
+    Args:
+        video_url: The url returned by the proxy
+        timeout: Seconds to wait for the download
+
+    Returns:
+        bytes: The encoded video
+    """
+    video_response = http_helpers.get(video_url, timeout=timeout)
+    video_response.raise_for_status()
+    return video_response.content
+
+
+def load_veo_video(video_data):
+    """
+    Split an encoded Veo video into ComfyUI components.
+
+    Args:
+        video_data: The encoded video (bytes or any buffer)
+
+    Returns:
+        tuple: (video, frames, audio, fps)
+    """
+    video_source = io.BytesIO(video_data)
+    video_source.seek(0)
+
+    # Create a proper video object that ComfyUI can handle
+    video_obj = VideoFromFile(video_source)
+
+    # Extract video components for VideoHelperSuite compatibility
+    try:
+        components = video_obj.get_components()
+        frames = components.images
+        audio = components.audio
+        fps = float(components.frame_rate)
+    except Exception as e:
+        # Fallback if component extraction fails
+        print(f"Warning: Could not extract video components: {e}")
+        frames = torch.zeros((1, 3, 512, 512))  # Single black frame
+        audio = None
+        fps = 30.0
+
+    return video_obj, frames, audio, fps
@@ -0,0 +1,145 @@
+import os
+import io
+import json
+import base64
+import requests
+import torch
+import numpy as np
+import folder_paths
+from PIL import Image
+from comfy.utils import ProgressBar
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import PromptSaverMixin, split_prompt_items
+from ..helpers.image_helpers import stack_images, image_data_entries
+from ..helpers.batch_job_helpers import BatchJob
+
+# The request field each target node puts its per-item prompt into
+PROMPT_FIELDS = {
+    "MaiLLMText": "user_prompt",
+    "MaiOpenAiLLMText": "input",
+    "MaiOpenAiImageGenerate": "prompt",
+}
+
+
+class MaiBatchJob(PromptSaverMixin):
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "batch_url": ("STRING", {"default": "", "multiline": False}),
+                "api_key": ("STRING", {"default": "", "multiline": False}),
+                "target": (list(PROMPT_FIELDS), {"default": "MaiLLMText"}),
+                "endpoint": ("STRING", {"default": "", "multiline": False}),
+                "prompts": ("STRING", {"default": "", "multiline": True}),
+                "settings": ("STRING", {"default": "{}", "multiline": True}),
+                "timeout_s": ("INT", {"default": 3600, "min": 1, "max": 604800}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "IMAGE", "STRING")
+    RETURN_NAMES = ("text", "texts", "images", "info")
+    OUTPUT_IS_LIST = (False, True, False, False)
+    FUNCTION = "run_batch_job"
+    CATEGORY = "mAI"
+
+    def _state_dir(self):
+        return os.environ.get("MAI_BATCH_DIR") or os.path.join(
+            folder_paths.get_output_directory(), "mai_batch_jobs"
+        )
+
+    def _decode_images(self, data):
+        tensors = []
+        for b64, _ in image_data_entries(data):
+            if not b64:
+                raise ValueError("[ERROR] The API returned an empty image.")
+            pil_image = Image.open(io.BytesIO(base64.b64decode(b64))).convert("RGB")
+            tensors.append(
+                (torch.from_numpy(np.array(pil_image)).float() / 255.0).unsqueeze(0)
+            )
+        if not tensors:
+            raise ValueError("[ERROR] The API returned no image.")
+        return tensors
+
+    def run_batch_job(
+        self,
+        batch_url,
+        api_key,
+        target,
+        endpoint,
+        prompts,
+        settings,
+        timeout_s,
+    ):
+        if not batch_url.strip():
+            raise ValueError("[ERROR] No batch URL provided.")
+
+        prompt_items = split_prompt_items(prompts)
+        if not prompt_items:
+            raise ValueError("[ERROR] No prompts provided.")
+
+        try:
+            shared = json.loads(settings or "{}")
+        except ValueError as e:
+            raise ValueError(f"[ERROR] settings is not valid JSON: {e}")
+
+        bodies = [{**shared, PROMPT_FIELDS[target]: p} for p in prompt_items]
+        headers = {"x-api-key": api_key.strip()}
+        job = BatchJob(
+            http_helpers.split_endpoints(batch_url),
+            headers,
+            endpoint.strip(),
+            bodies,
+            self._state_dir(),
+        )
+        pbar = ProgressBar(len(bodies))
+
+        try:
+            job.submit()
+            job.poll(
+                timeout_s,
+                on_progress=lambda done, total: pbar.update_absolute(done, total),
+            )
+
+            texts = [""] * len(bodies)
+            images = []
+            errors = []
+            # Results are decoded as they stream in, one line at a time
+            for index, result, error in job.iter_results():
+                prefix = f"[{index + 1}/{len(bodies)}]"
+                if error or not result:
+                    errors.append(f"{prefix} FAILED: {error or 'empty result'}")
+                    continue
+                if target != "MaiOpenAiImageGenerate":
+                    texts[index] = result.get("data", "")
+                    continue
+                # A bad image fails its own item, not the whole batch
+                try:
+                    decoded = self._decode_images(result.get("data") or [])
+                except Exception as e:
+                    errors.append(f"{prefix} FAILED: {e}")
+                    continue
+                for n, tensor in enumerate(decoded):
+                    images.append(((index, n), tensor))
+
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"[REQUEST ERROR] {e}")
+
+        info = "\n".join(
+            [f"Batch {job.state['batch_id']}: {len(bodies) - len(errors)} ok"]
+            + errors
+        )
+        text = "\n\n".join(t for t in texts if t)
+
+        if images:
+            images = stack_images([t for _, t in sorted(images)])
+        elif target == "MaiOpenAiImageGenerate":
+            raise RuntimeError(info)
+        else:
+            # Text batches have no images; a blank frame keeps IMAGE valid
+            images = torch.zeros((1, 64, 64, 3))
+
+        self.save_content(info, "MaiBatchJob")
+        return (text, texts, images, info)
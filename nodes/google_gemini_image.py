@@ -5,8 +5,12 @@ from PIL import Image
 import numpy as np
 import base64
 import json
+from email.parser import BytesParser
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
-from ..helpers.image_helpers import to_pil
+from ..helpers.json_helpers import Base64Part, JsonBody
+from ..helpers.image_helpers import to_pil, iter_pil_frames, dedupe_images
+from ..helpers.cache_helpers import get_cache, make_key
 
 
 class MaiGoogleGeminiImage(PromptSaverMixin):
@@ -63,6 +67,7 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
                     },
                 ),
                 "seed": ("INT", {"default": 42}),
+                "candidate_count": ("INT", {"default": 1, "min": 1, "max": 8}),
             },
             "optional": {
                 "image": ("IMAGE",),
@@ -73,6 +78,44 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
     FUNCTION = "call_gemini"
     CATEGORY = "mAI"
 
+    def _response_image_bytes(self, response):
+        # A single candidate comes back as the raw image. Several candidates
+        # come back either as multipart/mixed (one image per part) or as JSON
+        # holding a list of base64 images.
+        content_type = response.headers.get("Content-Type", "")
+
+        if content_type.startswith("multipart/"):
+            message = BytesParser().parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
+                + response.content
+            )
+            return [
+                part.get_payload(decode=True)
+                for part in message.walk()
+                if part.get_content_maintype() == "image"
+            ]
+
+        if content_type.startswith("application/json"):
+            result_json = response.json()
+            if isinstance(result_json, dict):
+                result_json = result_json.get("data") or result_json.get("images")
+            if isinstance(result_json, str):
+                result_json = [result_json]
+            return [base64.b64decode(b64) for b64 in result_json or []]
+
+        return [response.content]
+
+    def _images_to_tensor(self, images_bytes):
+        pil_images = [Image.open(io.BytesIO(b)).convert("RGB") for b in images_bytes]
+        size = pil_images[0].size
+        tensors = [
+            torch.from_numpy(
+                np.array(img if img.size == size else img.resize(size, Image.LANCZOS))
+            )
+            for img in pil_images
+        ]
+        return torch.stack(tensors).float() / 255.0
+
     def call_gemini(
         self,
         url,
@@ -85,6 +128,7 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
         temperature,
         top_p,
         seed,
+        candidate_count=1,
         image=None,
     ):
         if not url.strip():
@@ -93,32 +137,58 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
         if not model_name.strip():
             raise ValueError("[ERROR] No Model Name provided.")
 
+        cache = get_cache()
+        if cache is not None:
+            cache_key = make_key(
+                "MaiGoogleGeminiImage",
+                url=url.strip(),
+                model_name=model_name.strip(),
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                aspect_ratio=aspect_ratio,
+                image_size=image_size,
+                temperature=temperature,
+                top_p=top_p,
+                seed=seed,
+                candidate_count=candidate_count,
+                image=image,
+            )
+            cached = cache.get_tensor(cache_key)
+            if cached is not None:
+                return (cached[0],)
+
         headers = {"Content-Type": "application/json", "x-api-key": api_key.strip()}
 
         user_parts = [{"text": user_prompt}]
         if image is not None:
             if image.dim() == 4:
                 # Batch of images
-                batch_size = image.shape[0]
-                for i in range(batch_size):
-                    single_image = image[i]
-                    pil_image = to_pil(single_image)
-                    image_bytes = io.BytesIO()
-                    pil_image.save(image_bytes, format="JPEG")
-                    image_bytes.seek(0)
-                    image_base64 = base64.b64encode(image_bytes.getvalue()).decode(
-                        "utf-8"
-                    )
-                    user_parts.append(
-                        {"inlineData": {"mimeType": "image/jpeg", "data": image_base64}}
-                    )
+                pil_images = list(iter_pil_frames(image))
             else:
                 # Single image
-                pil_image = to_pil(image)
+                pil_images = [to_pil(image)]
+
+            # Repeated frames are inlined once; tell the model how the
+            # original image numbering maps onto what was uploaded.
+            unique_images, order = dedupe_images(pil_images)
+            moved = [
+                f"image {i} is uploaded image {k + 1}"
+                for i, k in enumerate(order, 1)
+                if k + 1 != i
+            ]
+            if moved:
+                user_parts.append(
+                    {
+                        "text": "Repeated images were uploaded once: "
+                        + ", ".join(moved)
+                        + "."
+                    }
+                )
+
+            for pil_image in unique_images:
                 image_bytes = io.BytesIO()
                 pil_image.save(image_bytes, format="JPEG")
-                image_bytes.seek(0)
-                image_base64 = base64.b64encode(image_bytes.getvalue()).decode("utf-8")
+                image_base64 = Base64Part(image_bytes.getbuffer())
                 user_parts.append(
                     {"inlineData": {"mimeType": "image/jpeg", "data": image_base64}}
                 )
@@ -137,6 +207,7 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
                 "topP": top_p,
                 "responseModalities": ["IMAGE"],
                 "imageConfig": image_config,
+                "candidateCount": candidate_count,
                 "tools": [{"googleSearch": {}}],
                 "systemInstruction": [{"text": system_prompt}],
             },
@@ -144,12 +215,21 @@ class MaiGoogleGeminiImage(PromptSaverMixin):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                data=JsonBody(payload),
+                timeout=180,
+            )
             response.raise_for_status()
 
-            pil_image = Image.open(io.BytesIO(response.content)).convert("RGB")
-            image_tensor = torch.from_numpy(np.array(pil_image)).float() / 255.0
-            image_tensor = image_tensor.unsqueeze(0)
+            images_bytes = self._response_image_bytes(response)
+            if not images_bytes:
+                raise RuntimeError("[ERROR] The API returned no images.")
+
+            image_tensor = self._images_to_tensor(images_bytes)
+            if cache is not None:
+                cache.put_tensor(cache_key, image_tensor)
 
             return (image_tensor,)
         except requests.exceptions.RequestException as e:
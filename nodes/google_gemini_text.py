@@ -1,9 +1,14 @@
 import requests
 import io
-import base64
-import json
-from ..helpers.prompt_helpers import PromptSaverMixin
-from ..helpers.image_helpers import to_pil
+from concurrent.futures import ThreadPoolExecutor
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import (
+    PromptSaverMixin,
+    prompt_cache_key,
+    cached_token_count,
+)
+from ..helpers.json_helpers import Base64Part, JsonBody
+from ..helpers.image_helpers import iter_pil_frames, encoded_image_bytes
 
 
 class MaiGoogleGeminiText(PromptSaverMixin):
@@ -41,17 +46,26 @@ class MaiGoogleGeminiText(PromptSaverMixin):
                 ),
                 "thinking_level": (["LOW", "HIGH"], {"default": "LOW"}),
                 "seed": ("INT", {"default": 42}),
+                "prompt_cache": ("BOOLEAN", {"default": False}),
+                "max_frames": ("INT", {"default": 16, "min": 1, "max": 3000}),
+                "frame_stride": ("INT", {"default": 1, "min": 1, "max": 1000}),
             },
             "optional": {
                 "image": ("IMAGE",),
+                "encoded_image": ("ENCODED_IMAGE",),
             },
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("text", "model")
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("text", "model", "cached_tokens")
     FUNCTION = "call_gemini"
     CATEGORY = "mAI"
 
+    def _encode_jpeg(self, pil_image):
+        image_bytes = io.BytesIO()
+        pil_image.save(image_bytes, format="JPEG")
+        return Base64Part(image_bytes.getbuffer())
+
     def call_gemini(
         self,
         url,
@@ -63,7 +77,11 @@ class MaiGoogleGeminiText(PromptSaverMixin):
         top_p,
         thinking_level,
         seed,
+        prompt_cache=False,
+        max_frames=16,
+        frame_stride=1,
         image=None,
+        encoded_image=None,
     ):
         if not url.strip():
             raise ValueError("[ERROR] No URL provided.")
@@ -73,13 +91,31 @@ class MaiGoogleGeminiText(PromptSaverMixin):
         user_parts = [{"text": user_prompt}]
 
         if image is not None:
-            pil_image = to_pil(image)
-            image_bytes = io.BytesIO()
-            pil_image.save(image_bytes, format="JPEG")
-            image_bytes.seek(0)
-            image_base64 = base64.b64encode(image_bytes.getvalue()).decode("utf-8")
+            # Every frame (every frame_stride-th, up to max_frames) becomes
+            # its own inlineData part of a single request.
+            frames = image if image.dim() == 4 else image.unsqueeze(0)
+            frames = frames[::frame_stride][:max_frames]
+            with ThreadPoolExecutor(max_workers=min(8, len(frames))) as pool:
+                # Frames are JPEG-encoded while the next ones leave the device
+                futures = [
+                    pool.submit(self._encode_jpeg, pil_image)
+                    for pil_image in iter_pil_frames(frames)
+                ]
+                for future in futures:
+                    user_parts.append(
+                        {
+                            "inlineData": {
+                                "mimeType": "image/jpeg",
+                                "data": future.result(),
+                            }
+                        }
+                    )
+
+        if encoded_image is not None:
+            # The original file bytes are base64-encoded while the body streams
+            image_data, mime_type, _ = encoded_image_bytes(encoded_image)
             user_parts.append(
-                {"inlineData": {"mimeType": "image/jpeg", "data": image_base64}}
+                {"inlineData": {"mimeType": mime_type, "data": Base64Part(image_data)}}
             )
 
         payload = {
@@ -100,8 +136,19 @@ class MaiGoogleGeminiText(PromptSaverMixin):
             "contents": [{"role": "user", "parts": user_parts}],
         }
 
+        # Opt-in: Gemini's API has no such field, so this only helps behind a
+        # proxy that maps promptCacheKey onto a cachedContent holding the
+        # system instruction. Other proxies may reject the unknown field.
+        if prompt_cache and system_prompt.strip():
+            payload["promptCacheKey"] = prompt_cache_key(model, system_prompt)
+
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                data=JsonBody(payload),
+                timeout=180,
+            )
             response.raise_for_status()
             data = response.json()
             llm_text = data.get("data", "")
@@ -111,7 +158,7 @@ class MaiGoogleGeminiText(PromptSaverMixin):
                 raise ValueError("[ERROR] The LLM returned an empty response.")
 
             self.save_content(llm_text, "MaiGoogleGeminiText-text")
-            return (llm_text, model_name)
+            return (llm_text, model_name, cached_token_count(data))
         except requests.exceptions.RequestException as e:
             error_message = f"[REQUEST ERROR] {e}"
 
@@ -4,7 +4,10 @@ import torch
 from PIL import Image
 import numpy as np
 import base64
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.cache_helpers import get_cache, make_key
+from ..helpers.image_helpers import stack_images
 
 
 class MaiGoogleImageGenerate(PromptSaverMixin):
@@ -40,10 +43,12 @@ class MaiGoogleImageGenerate(PromptSaverMixin):
                 "height": ("INT", {"default": 0, "min": 0}),
                 "enhance_prompt": ("BOOLEAN", {"default": False}),
                 "seed": ("INT", {"default": 100, "min": 0}),
+                "batch_count": ("INT", {"default": 1, "min": 1, "max": 64}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = ("IMAGE", "STRING")
+    RETURN_NAMES = ("image", "info")
     FUNCTION = "generate_image"
     CATEGORY = "mAI"
 
@@ -69,6 +74,27 @@ class MaiGoogleImageGenerate(PromptSaverMixin):
             # Default to 1:1 if no close match
             return "1:1"
 
+    def _request_image(self, url, headers, payload):
+        try:
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                json=payload,
+                timeout=180,
+            )
+            response.raise_for_status()
+
+            pil_image = Image.open(io.BytesIO(response.content)).convert("RGB")
+            image_tensor = torch.from_numpy(np.array(pil_image)).float() / 255.0
+            return image_tensor.unsqueeze(0)
+
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"[REQUEST ERROR] {e}")
+        except Exception as e:
+            # A cancelled prompt must surface as an interrupt, not an error
+            http_helpers.check_interrupted()
+            raise RuntimeError(f"[ERROR] {str(e)}")
+
     def generate_image(
         self,
         url,
@@ -80,31 +106,68 @@ class MaiGoogleImageGenerate(PromptSaverMixin):
         height,
         enhance_prompt,
         seed,
+        batch_count=1,
     ):
         if not url.strip():
             raise ValueError("[ERROR] No URL provided.")
 
+        cache = get_cache()
+        if cache is not None:
+            cache_key = make_key(
+                "MaiGoogleImageGenerate",
+                url=url.strip(),
+                prompt=prompt,
+                model=model,
+                aspect_ratio=aspect_ratio,
+                width=width,
+                height=height,
+                enhance_prompt=enhance_prompt,
+                seed=seed,
+                batch_count=batch_count,
+            )
+            cached = cache.get_tensor(cache_key)
+            if cached is not None:
+                images, meta = cached
+                return (images, meta.get("info", ""))
+
         headers = {"Content-Type": "application/json", "x-api-key": api_key.strip()}
 
-        payload = {
-            "prompt": prompt,
-            "model": model,
-            "aspectRatio": self._get_aspect_ratio(aspect_ratio, width, height),
-            "enhancePrompt": enhance_prompt,
-            "seed": seed,
-        }
+        payloads = [
+            {
+                "prompt": prompt,
+                "model": model,
+                "aspectRatio": self._get_aspect_ratio(aspect_ratio, width, height),
+                "enhancePrompt": enhance_prompt,
+                # Deterministic seed offset per batch item
+                "seed": seed + item,
+            }
+            for item in range(batch_count)
+        ]
 
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
-            response.raise_for_status()
+        if batch_count == 1:
+            results = [self._request_image(url, headers, payloads[0])]
+        else:
+            results = http_helpers.map_concurrent(
+                lambda payload: self._request_image(url, headers, payload),
+                payloads,
+                max_workers=batch_count,
+            )
 
-            pil_image = Image.open(io.BytesIO(response.content)).convert("RGB")
-            image_tensor = torch.from_numpy(np.array(pil_image)).float() / 255.0
-            image_tensor = image_tensor.unsqueeze(0)
+        image_tensors = []
+        info_lines = []
+        for item, (payload, result) in enumerate(zip(payloads, results), 1):
+            if isinstance(result, Exception):
+                info_lines.append(f"[{item}/{batch_count}] FAILED: {result}")
+                continue
+            image_tensors.append(result)
+            info_lines.append(f"[{item}/{batch_count}] seed {payload['seed']}")
 
-            return (image_tensor,)
+        if not image_tensors:
+            raise RuntimeError("\n".join(info_lines))
 
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"[REQUEST ERROR] {e}")
-        except Exception as e:
-            raise RuntimeError(f"[ERROR] {str(e)}")
+        image_tensor = stack_images(image_tensors)
+        info = "\n".join(info_lines)
+        if cache is not None and len(image_tensors) == len(results):
+            cache.put_tensor(cache_key, image_tensor, {"info": info})
+
+        return (image_tensor, info)
@@ -0,0 +1,70 @@
+import requests
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.veo_helpers import poll_veo_job, download_veo_video, load_veo_video
+
+
+class MaiGoogleVeoAwaitResult(PromptSaverMixin):
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "jobs": ("VEO_JOB",),
+                "api_key": ("STRING", {"default": "", "multiline": False}),
+                "timeout_s": ("INT", {"default": 900, "min": 1, "max": 86400}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "VIDEO", "IMAGE", "AUDIO", "FLOAT", "STRING")
+    RETURN_NAMES = ("video_url", "video", "frames", "audio", "fps", "info")
+    OUTPUT_IS_LIST = (True, True, True, True, True, False)
+    FUNCTION = "await_veo"
+    CATEGORY = "mAI"
+
+    def await_veo(self, jobs, api_key, timeout_s):
+        """
+        Poll every submitted job together and download the finished videos.
+
+        Outputs are lists in job order. A job that failed is left out of them
+        and reported in info; the node only fails if every job did.
+        """
+        if not jobs:
+            raise ValueError("[ERROR] No Veo job provided.")
+
+        headers = {"x-api-key": api_key.strip()}
+
+        def collect(job):
+            try:
+                video_url = poll_veo_job(
+                    job, headers, timeout=timeout_s, progress=len(jobs) == 1
+                )
+                video_data = download_veo_video(video_url)
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"[REQUEST ERROR] {e}")
+            return (video_url,) + load_veo_video(video_data)
+
+        if len(jobs) == 1:
+            results = [collect(jobs[0])]
+        else:
+            results = http_helpers.map_concurrent(collect, jobs, max_workers=len(jobs))
+
+        outputs = ([], [], [], [], [])
+        info_lines = []
+        for item, result in enumerate(results, 1):
+            prefix = f"[{item}/{len(jobs)}]"
+            if isinstance(result, Exception):
+                info_lines.append(f"{prefix} FAILED: {result}")
+                continue
+            for output, value in zip(outputs, result):
+                output.append(value)
+            info_lines.append(f"{prefix} {result[0]}")
+
+        info = "\n".join(info_lines)
+        if not outputs[0]:
+            raise RuntimeError(info)
+
+        self.save_content("\n".join(outputs[0]), "MaiGoogleVeoAwaitResult")
+        return outputs + (info,)
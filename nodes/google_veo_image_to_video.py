@@ -1,10 +1,14 @@
 import requests
-import io
-import torch
-import json
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
-from ..helpers.image_helpers import to_pil
-from comfy_api.input_impl.video_types import VideoFromFile
+from ..helpers.cache_helpers import get_cache, make_key
+from ..helpers.veo_helpers import (
+    build_veo_request,
+    submit_veo_job,
+    poll_veo_job,
+    download_veo_video,
+    load_veo_video,
+)
 
 # List of supported params: https://cloud.google.com/vertex-ai/generative-ai/docs/model-reference/veo-video-generation
 
@@ -17,7 +21,6 @@ class MaiGoogleVeoImageToVideo(PromptSaverMixin):
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "image": ("IMAGE",),
                 "url": ("STRING", {"default": "", "multiline": False}),
                 "api_key": ("STRING", {"default": "", "multiline": False}),
                 "user_prompt": ("STRING", {"default": "", "multiline": True}),
@@ -27,7 +30,12 @@ class MaiGoogleVeoImageToVideo(PromptSaverMixin):
                 "resolution": (["720p", "1080p"], {"default": "720p"}),
                 "durationSeconds": ([4, 6, 8], {"default": 4}),
                 "seed": ("INT", {"default": 42}),
-            }
+                "mode": (["blocking", "poll"], {"default": "blocking"}),
+            },
+            "optional": {
+                "image": ("IMAGE",),
+                "encoded_image": ("ENCODED_IMAGE",),
+            },
         }
 
     RETURN_TYPES = ("STRING", "VIDEO", "IMAGE", "AUDIO", "FLOAT")
@@ -37,7 +45,6 @@ class MaiGoogleVeoImageToVideo(PromptSaverMixin):
 
     def call_veo(
         self,
-        image,
         url,
         api_key,
         user_prompt,
@@ -47,67 +54,74 @@ class MaiGoogleVeoImageToVideo(PromptSaverMixin):
         resolution,
         durationSeconds,
         seed,
+        mode="blocking",
+        image=None,
+        encoded_image=None,
     ):
         if not url.strip():
             raise ValueError("[ERROR] No URL provided.")
 
-        # Convert the incoming ComfyUI tensor to a valid PIL image
-        pil_image = to_pil(image)
-
-        # Save as JPEG in memory
-        image_bytes = io.BytesIO()
-        pil_image.save(image_bytes, format="JPEG")
-        image_bytes.seek(0)
-
-        # Prepare request
+        if image is None and encoded_image is None:
+            raise ValueError("[ERROR] No image provided.")
+
+        cache = get_cache()
+        if cache is not None:
+            cache_key = make_key(
+                "MaiGoogleVeoImageToVideo",
+                image=image,
+                encoded_image=encoded_image["sha256"] if encoded_image else None,
+                url=url.strip(),
+                user_prompt=user_prompt,
+                negative_prompt=negative_prompt,
+                aspectRatio=aspectRatio,
+                resizeMode=resizeMode,
+                resolution=resolution,
+                durationSeconds=durationSeconds,
+                seed=seed,
+            )
+            cached = cache.get_bytes(cache_key)
+            if cached is not None:
+                video_data, meta = cached
+                video_url = meta.get("video_url", "")
+                video_obj, frames, audio, fps = load_veo_video(video_data)
+                self.save_content(video_url, "MaiGoogleVeoImageToVideo")
+                return (video_url, video_obj, frames, audio, fps)
+
+        endpoints = http_helpers.split_endpoints(url)
         headers = {"x-api-key": api_key.strip()}
-        data = {
-            "prompt": user_prompt,
-            "params": json.dumps(
-                {
-                    "negative_prompt": negative_prompt,
-                    "aspectRatio": aspectRatio,
-                    "resizeMode": resizeMode,
-                    "resolution": resolution,
-                    "durationSeconds": durationSeconds,
-                }
-            ),
-        }
-        files = {"file": ("image.jpg", image_bytes, "image/jpeg")}
+        data, files = build_veo_request(
+            user_prompt,
+            negative_prompt,
+            aspectRatio,
+            resizeMode,
+            resolution,
+            durationSeconds,
+            image=image,
+            encoded_image=encoded_image,
+        )
 
         try:
-            response = requests.post(
-                url, headers=headers, data=data, files=files, timeout=400
-            )
-            response.raise_for_status()
-            result_json = response.json()
-            video_url = result_json.get("url", "")
-
-            if not video_url.strip():
-                raise ValueError("[ERROR] Empty response.")
-
-            # Download the video and create a proper VideoFromFile object
-            video_response = requests.get(video_url, timeout=400)
-            video_response.raise_for_status()
-
-            video_bytes = io.BytesIO(video_response.content)
-            video_bytes.seek(0)
-
-            # Create a proper video object that ComfyUI can handle
-            video_obj = VideoFromFile(video_bytes)
-
-            # Extract video components for VideoHelperSuite compatibility
-            try:
-                components = video_obj.get_components()
-                frames = components.images
-                audio = components.audio
-                fps = float(components.frame_rate)
-            except Exception as e:
-                # Fallback if component extraction fails
-                print(f"Warning: Could not extract video components: {e}")
-                frames = torch.zeros((1, 3, 512, 512))  # Single black frame
-                audio = None
-                fps = 30.0
+            # "poll" submits a job instead of holding the connection open
+            # while the video renders. To start several renders and collect
+            # them together, use MaiGoogleVeoSubmit and MaiGoogleVeoAwaitResult.
+            if mode == "poll":
+                job = submit_veo_job(endpoints, headers, data, files)
+                video_url = poll_veo_job(job, headers)
+            else:
+                response = http_helpers.post(
+                    endpoints, headers=headers, data=data, files=files, timeout=400
+                )
+                response.raise_for_status()
+                result_json = response.json()
+                video_url = result_json.get("url", "")
+
+                if not video_url.strip():
+                    raise ValueError("[ERROR] Empty response.")
+
+            video_data = download_veo_video(video_url)
+            if cache is not None:
+                cache.put_bytes(cache_key, video_data, {"video_url": video_url})
+            video_obj, frames, audio, fps = load_veo_video(video_data)
 
             self.save_content(video_url, "MaiGoogleVeoImageToVideo")
             return (video_url, video_obj, frames, audio, fps)
@@ -0,0 +1,82 @@
+import requests
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.veo_helpers import build_veo_request, submit_veo_job
+
+
+class MaiGoogleVeoSubmit(PromptSaverMixin):
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "url": ("STRING", {"default": "", "multiline": False}),
+                "api_key": ("STRING", {"default": "", "multiline": False}),
+                "user_prompt": ("STRING", {"default": "", "multiline": True}),
+                "negative_prompt": ("STRING", {"default": "", "multiline": True}),
+                "aspectRatio": (["16:9", "9:16"], {"default": "16:9"}),
+                "resizeMode": (["crop", "pad"], {"default": "crop"}),
+                "resolution": (["720p", "1080p"], {"default": "720p"}),
+                "durationSeconds": ([4, 6, 8], {"default": 4}),
+            },
+            "optional": {
+                "image": ("IMAGE",),
+                "encoded_image": ("ENCODED_IMAGE",),
+                "jobs": ("VEO_JOB",),
+            },
+        }
+
+    RETURN_TYPES = ("VEO_JOB",)
+    RETURN_NAMES = ("jobs",)
+    FUNCTION = "submit_veo"
+    CATEGORY = "mAI"
+
+    def submit_veo(
+        self,
+        url,
+        api_key,
+        user_prompt,
+        negative_prompt,
+        aspectRatio,
+        resizeMode,
+        resolution,
+        durationSeconds,
+        image=None,
+        encoded_image=None,
+        jobs=None,
+    ):
+        """
+        Start a Veo render and return right away.
+
+        The new job is appended to the jobs input, so chaining submit nodes
+        starts every render before a single MaiGoogleVeoAwaitResult collects
+        them together.
+        """
+        if not url.strip():
+            raise ValueError("[ERROR] No URL provided.")
+
+        if image is None and encoded_image is None:
+            raise ValueError("[ERROR] No image provided.")
+
+        endpoints = http_helpers.split_endpoints(url)
+        headers = {"x-api-key": api_key.strip()}
+        data, files = build_veo_request(
+            user_prompt,
+            negative_prompt,
+            aspectRatio,
+            resizeMode,
+            resolution,
+            durationSeconds,
+            image=image,
+            encoded_image=encoded_image,
+        )
+
+        try:
+            job = submit_veo_job(endpoints, headers, data, files)
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"[REQUEST ERROR] {e}")
+
+        self.save_content(job["job_id"] or job["video_url"], "MaiGoogleVeoSubmit")
+        return (list(jobs or []) + [job],)
@@ -1,5 +1,6 @@
 import torch
 import torchvision.transforms.functional as F
+from ..helpers.image_helpers import apply_in_mask
 
 
 class MaiImageContrast:
@@ -15,21 +16,39 @@ class MaiImageContrast:
                     "FLOAT",
                     {"default": 1.0, "min": 0.0, "max": 5.0, "step": 0.01},
                 ),
-            }
+            },
+            "optional": {
+                "mask": ("MASK",),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
     FUNCTION = "call_image_contrast"
     CATEGORY = "mAI"
 
+    def _adjust_region(self, region, frame, factor):
+        # adjust_contrast blends towards the mean gray of the whole frame, so
+        # take the mean from the full frame rather than from the crop.
+        mean = F.rgb_to_grayscale(frame.permute(0, 3, 1, 2)).mean()
+        return (factor * region + (1.0 - factor) * mean).clamp(0.0, 1.0)
+
     def call_image_contrast(
         self,
         image: torch.Tensor,
         factor: float,
+        mask: torch.Tensor = None,
     ):
         assert isinstance(image, torch.Tensor)
         assert isinstance(factor, float)
 
+        if mask is not None:
+            image = apply_in_mask(
+                image,
+                mask,
+                lambda region, frame: self._adjust_region(region, frame, factor),
+            )
+            return (image,)
+
         image = image.permute(0, 3, 1, 2)
         image = F.adjust_contrast(image, factor)
         image = image.permute(0, 2, 3, 1)
@@ -1,5 +1,6 @@
 import torch
 import torchvision.transforms.functional as F
+from ..helpers.image_helpers import apply_in_mask
 
 
 class MaiImageSaturation:
@@ -15,7 +16,10 @@ class MaiImageSaturation:
                     "FLOAT",
                     {"default": 1.0, "min": 0.0, "max": 5.0, "step": 0.01},
                 ),
-            }
+            },
+            "optional": {
+                "mask": ("MASK",),
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -26,10 +30,17 @@ class MaiImageSaturation:
         self,
         image: torch.Tensor,
         factor: float,
+        mask: torch.Tensor = None,
     ):
         assert isinstance(image, torch.Tensor)
         assert isinstance(factor, float)
 
+        if mask is not None:
+            image = apply_in_mask(
+                image, mask, lambda region, frame: F.adjust_saturation(region, factor)
+            )
+            return (image,)
+
         image = image.permute(0, 3, 1, 2)
         image = F.adjust_saturation(image, factor)
         image = image.permute(0, 2, 3, 1)
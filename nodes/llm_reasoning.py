@@ -1,4 +1,5 @@
 import requests
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
 
 
@@ -69,7 +70,12 @@ class MaiLLMReasoning(PromptSaverMixin):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                json=payload,
+                timeout=180,
+            )
             response.raise_for_status()
             data = response.json()
             llm_text = data.get("data", "")
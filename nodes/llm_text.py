@@ -1,5 +1,10 @@
+import time
 import requests
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.provider_helpers import provider_stats
+
+PROVIDERS = ["samba_nova", "groq"]
 
 
 class MaiLLMText(PromptSaverMixin):
@@ -14,7 +19,7 @@ class MaiLLMText(PromptSaverMixin):
                 "api_key": ("STRING", {"default": "", "multiline": False}),
                 "system_prompt": ("STRING", {"default": "", "multiline": True}),
                 "user_prompt": ("STRING", {"default": "", "multiline": True}),
-                "provider": (["samba_nova", "groq"], {"default": "groq"}),
+                "provider": (PROVIDERS + ["auto"], {"default": "groq"}),
                 "model": (
                     "STRING",
                     {"default": "openai/gpt-oss-120b", "multiline": False},
@@ -77,6 +82,13 @@ class MaiLLMText(PromptSaverMixin):
 
         headers = {"Content-Type": "application/json", "x-api-key": api_key.strip()}
 
+        # "auto" routes to the fastest healthy provider seen recently and
+        # tightens timeout_ms to its observed latency, so a slow provider
+        # does not make every call wait out the full timeout.
+        if provider == "auto":
+            provider = provider_stats.choose(PROVIDERS, model)
+            timeout_ms = provider_stats.tune_timeout(provider, model, timeout_ms)
+
         payload = {
             "system_prompt": system_prompt,
             "user_prompt": user_prompt,
@@ -90,12 +102,23 @@ class MaiLLMText(PromptSaverMixin):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            started = time.monotonic()
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                json=payload,
+                timeout=180,
+            )
             response.raise_for_status()
             data = response.json()
             llm_text = data.get("data", "")
             timed_out = data.get("timedOut", "")
 
+            latency_ms = (time.monotonic() - started) * 1000
+            provider_stats.record(
+                provider, model, timeout_ms if timed_out else latency_ms, timed_out
+            )
+
             if not llm_text.strip():
                 raise ValueError("[ERROR] The LLM returned an empty response.")
 
@@ -1,9 +1,13 @@
 import requests
 import io
-import torch
-from PIL import Image
-import numpy as np
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.image_helpers import (
+    to_pil,
+    iter_pil_frames,
+    encoded_image_bytes,
+    JPEG_PNG_MIME_TYPES,
+)
 
 
 class MaiLLMVision(PromptSaverMixin):
@@ -14,7 +18,6 @@ class MaiLLMVision(PromptSaverMixin):
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "image": ("IMAGE",),
                 "url": ("STRING", {"default": "", "multiline": False}),
                 "api_key": ("STRING", {"default": "", "multiline": False}),
                 "user_prompt": ("STRING", {"default": "", "multiline": True}),
@@ -43,16 +46,24 @@ class MaiLLMVision(PromptSaverMixin):
                     {"default": 1024, "step": 1, "display": "number"},
                 ),
                 "seed": ("INT", {"default": 42}),
-            }
+                "batch_mode": ("BOOLEAN", {"default": False}),
+                "frame_stride": ("INT", {"default": 1, "min": 1, "max": 1000}),
+                "max_concurrency": ("INT", {"default": 4, "min": 1, "max": 64}),
+            },
+            "optional": {
+                "image": ("IMAGE",),
+                "encoded_image": ("ENCODED_IMAGE",),
+            },
         }
 
-    RETURN_TYPES = ("STRING",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("text", "captions")
+    OUTPUT_IS_LIST = (False, True)
     FUNCTION = "call_llm_vision"
     CATEGORY = "mAI"
 
     def call_llm_vision(
         self,
-        image,
         url,
         api_key,
         user_prompt,
@@ -60,17 +71,17 @@ class MaiLLMVision(PromptSaverMixin):
         top_p,
         max_tokens,
         seed,
+        batch_mode=False,
+        frame_stride=1,
+        max_concurrency=4,
+        image=None,
+        encoded_image=None,
     ):
         if not url.strip():
             raise ValueError("[ERROR] No URL provided.")
 
-        # Convert the incoming ComfyUI tensor to a valid PIL image
-        pil_image = self._to_pil(image)
-
-        # Save as JPEG in memory
-        image_bytes = io.BytesIO()
-        pil_image.save(image_bytes, format="JPEG")
-        image_bytes.seek(0)
+        if image is None and encoded_image is None:
+            raise ValueError("[ERROR] No image provided.")
 
         # Prepare request
         headers = {"x-api-key": api_key.strip()}
@@ -81,11 +92,76 @@ class MaiLLMVision(PromptSaverMixin):
             "max_tokens": str(max_tokens),
             "seed": str(seed),
         }
+
+        if encoded_image is not None:
+            # The original file bytes go out as they are, without a decode.
+            # The proxy has only ever been sent JPEG, so other formats than
+            # JPEG and PNG are re-encoded to JPEG.
+            image_data, mime_type, ext = encoded_image_bytes(
+                encoded_image, accepted=JPEG_PNG_MIME_TYPES
+            )
+            files = {"file": (f"image.{ext}", image_data, mime_type)}
+            llm_text = self._post_caption(files, url, headers, data)
+            self.save_content(llm_text, "MaiLLMVision")
+            return (llm_text, [llm_text])
+
+        if not batch_mode or image.dim() != 4:
+            llm_text = self._caption_frame(self._to_pil(image), url, headers, data)
+            self.save_content(llm_text, "MaiLLMVision")
+            return (llm_text, [llm_text])
+
+        # Caption every frame_stride-th frame of the batch as its own request.
+        # Frames are decoded only as requests finish, so at most
+        # max_concurrency of them are held at once, and the transfer from the
+        # device overlaps with the requests already in flight.
+        frame_indices = list(range(0, image.shape[0], frame_stride))
+        results = http_helpers.map_concurrent(
+            lambda pil_image: self._caption_frame(
+                pil_image, url, headers, data, http_helpers.BATCH
+            ),
+            iter_pil_frames(image[::frame_stride]),
+            max_workers=max_concurrency,
+        )
+
+        captions = []
+        text_lines = []
+        for i, result in zip(frame_indices, results):
+            if isinstance(result, Exception):
+                captions.append("")
+                text_lines.append(f"[{i}] FAILED: {result}")
+                continue
+            captions.append(result)
+            text_lines.append(f"[{i}] {result}")
+
+        llm_text = "\n".join(text_lines)
+        if not any(captions):
+            raise RuntimeError(llm_text)
+
+        self.save_content(llm_text, "MaiLLMVision")
+        return (llm_text, captions)
+
+    def _caption_frame(
+        self, pil_image, url, headers, data, priority=http_helpers.INTERACTIVE
+    ):
+        # Save as JPEG in memory
+        image_bytes = io.BytesIO()
+        pil_image.save(image_bytes, format="JPEG")
+        image_bytes.seek(0)
+
         files = {"file": ("image.jpg", image_bytes, "image/jpeg")}
+        return self._post_caption(files, url, headers, data, priority)
 
+    def _post_caption(
+        self, files, url, headers, data, priority=http_helpers.INTERACTIVE
+    ):
         try:
-            response = requests.post(
-                url, headers=headers, data=data, files=files, timeout=180
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                data=data,
+                files=files,
+                timeout=180,
+                priority=priority,
             )
             response.raise_for_status()
             result_json = response.json()
@@ -94,29 +170,10 @@ class MaiLLMVision(PromptSaverMixin):
             if not llm_text.strip():
                 raise ValueError("[ERROR] The LLM returned an empty response.")
 
-            self.save_content(llm_text, "MaiLLMVision")
-            return (llm_text,)
+            return llm_text
 
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"[REQUEST ERROR] {e}")
 
     def _to_pil(self, tensor):
-        if not isinstance(tensor, torch.Tensor):
-            raise TypeError(f"Expected torch.Tensor but got {type(tensor)}")
-
-        if tensor.dim() == 4:
-            tensor = tensor[0]
-
-        if tensor.shape[0] <= 4:
-            tensor = tensor.permute(1, 2, 0)
-
-        image_np = (tensor.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
-        modes = {1: "L", 3: "RGB", 4: "RGBA"}
-        channels = image_np.shape[2]
-
-        if channels not in modes:
-            raise ValueError(f"Unexpected channel count: {channels}")
-
-        return Image.fromarray(
-            image_np[..., 0] if channels == 1 else image_np, mode=modes[channels]
-        )
+        return to_pil(tensor)
@@ -0,0 +1,44 @@
+import os
+import folder_paths
+from ..helpers.image_helpers import load_encoded_image
+
+
+class MaiLoadEncodedImage:
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        input_dir = folder_paths.get_input_directory()
+        files = [
+            f
+            for f in os.listdir(input_dir)
+            if os.path.isfile(os.path.join(input_dir, f))
+        ]
+        return {
+            "required": {
+                "image": (sorted(files), {"image_upload": True}),
+            }
+        }
+
+    RETURN_TYPES = ("ENCODED_IMAGE", "INT", "INT")
+    RETURN_NAMES = ("encoded_image", "width", "height")
+    FUNCTION = "load_encoded"
+    CATEGORY = "mAI"
+
+    @classmethod
+    def IS_CHANGED(cls, image):
+        stat = os.stat(folder_paths.get_annotated_filepath(image))
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    @classmethod
+    def VALIDATE_INPUTS(cls, image):
+        if not os.path.isfile(folder_paths.get_annotated_filepath(image)):
+            return f"Invalid image file: {image}"
+        return True
+
+    def load_encoded(self, image):
+        # The file is memory-mapped and passed on undecoded, so nodes that
+        # accept ENCODED_IMAGE upload the original bytes.
+        encoded = load_encoded_image(folder_paths.get_annotated_filepath(image))
+        return (encoded, encoded["width"], encoded["height"])
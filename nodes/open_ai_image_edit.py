@@ -1,11 +1,22 @@
-import re
+import os
 import io
 import base64
 import requests
 import torch
 import numpy as np
+import folder_paths
 from PIL import Image
-from ..helpers.prompt_helpers import PromptSaverMixin
+from comfy.utils import ProgressBar
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import PromptSaverMixin, split_prompt_items
+from ..helpers.cache_helpers import get_cache, make_key
+from ..helpers.image_helpers import (
+    dedupe_images,
+    iter_pil_frames,
+    encoded_image_bytes,
+)
+from ..helpers.json_helpers import Base64Part, JsonBody
+from ..helpers.encode_helpers import get_encoder
 
 
 class MaiOpenAiImageEdit(PromptSaverMixin):
@@ -16,7 +27,6 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "image": ("IMAGE",),
                 "url": ("STRING", {"default": "", "multiline": False}),
                 "api_key": ("STRING", {"default": "", "multiline": False}),
                 "model": ("STRING", {"default": "gpt-image-2", "multiline": False}),
@@ -42,10 +52,14 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
                 "width": ("INT", {"default": 0, "min": 0}),
                 "height": ("INT", {"default": 0, "min": 0}),
                 "seed": ("INT", {"default": 42}),
+                "count": ("INT", {"default": 1, "min": 1, "max": 10}),
             },
             "optional": {
+                "image": ("IMAGE",),
+                "encoded_image": ("ENCODED_IMAGE",),
                 "refs": ("IMAGE",),
                 "mask": ("MASK",),
+                "save_prefix": ("STRING", {"default": "", "multiline": False}),
             },
         }
 
@@ -70,33 +84,34 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
         return "1024x1536"
 
     def _split_prompt_items(self, prompt):
-        items = [p.strip() for p in re.split(r"\n\s*\n+", prompt.strip())]
-        return [p for p in items if p]
+        return split_prompt_items(prompt)
 
-    def _build_edit_prompt_with_references(self, prompt_item, ref_count):
+    def _build_edit_prompt_with_references(
+        self, prompt_item, ref_count, ref_order=None
+    ):
+        dedupe_note = self._describe_ref_dedupe(ref_order or [])
         if ref_count <= 0:
-            return prompt_item
+            return f"{dedupe_note}{prompt_item}"
         noun = "reference image" if ref_count == 1 else "reference images"
-        return f"{ref_count} {noun} are provided. {prompt_item}"
+        return f"{ref_count} {noun} are provided. {dedupe_note}{prompt_item}"
+
+    def _describe_ref_dedupe(self, ref_order):
+        # ref_order[i] is what original reference i+1 was uploaded as:
+        # 0 for the base image, k for the k-th uploaded reference image.
+        moved = [
+            f"reference image {i} is "
+            + ("the base image" if k == 0 else f"uploaded reference image {k}")
+            for i, k in enumerate(ref_order, 1)
+            if k != i
+        ]
+        if not moved:
+            return ""
+        return (
+            "Repeated reference images were uploaded once: " + ", ".join(moved) + ". "
+        )
 
     def _tensor_frame_to_pil(self, frame):
-        if frame.dim() == 3 and frame.shape[0] <= 4 and frame.shape[-1] > 4:
-            frame = frame.permute(1, 2, 0)
-
-        image_np = (frame.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
-
-        if image_np.ndim == 2:
-            return Image.fromarray(image_np, mode="L")
-
-        modes = {1: "L", 3: "RGB", 4: "RGBA"}
-        channels = image_np.shape[-1]
-
-        if channels not in modes:
-            raise ValueError(f"Unexpected channel count: {channels}")
-
-        return Image.fromarray(
-            image_np[..., 0] if channels == 1 else image_np, mode=modes[channels]
-        )
+        return next(iter_pil_frames(frame))
 
     def _first_image_to_pil(self, tensor):
         if not isinstance(tensor, torch.Tensor):
@@ -108,17 +123,27 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
     def _iter_batch_to_pil(self, tensor):
         if not isinstance(tensor, torch.Tensor):
             raise TypeError(f"Expected torch.Tensor but got {type(tensor)}")
-        if tensor.dim() == 3:
-            yield self._tensor_frame_to_pil(tensor)
-            return
-        for i in range(tensor.shape[0]):
-            yield self._tensor_frame_to_pil(tensor[i])
+        # Frames are transferred off the device while the caller encodes
+        yield from iter_pil_frames(tensor)
 
     def _pil_to_b64_png(self, img):
         buf = io.BytesIO()
-        mode = "RGBA" if img.mode == "RGBA" else "RGB"
+        mode = img.mode if img.mode in ("RGBA", "LA") else "RGB"
         img.convert(mode).save(buf, format="PNG")
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
+        # Encoded chunk by chunk while the request body is streamed
+        return Base64Part(buf.getbuffer())
+
+    def _encode_pngs(self, images):
+        encoder = get_encoder()
+        if encoder is None or len(images) < 2:
+            return [self._pil_to_b64_png(img) for img in images]
+        # Large base/ref/mask sets are encoded on all cores
+        images = [
+            img if img.mode in ("RGBA", "LA") else img.convert("RGB") for img in images
+        ]
+        return [
+            Base64Part(b64, encoded=True) for b64 in encoder.encode_png_b64(images)
+        ]
 
     def _base64_to_pil(self, b64_str):
         return Image.open(io.BytesIO(base64.b64decode(b64_str))).convert("RGB")
@@ -135,31 +160,56 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
         if mask_tensor.dim() == 4:
             mask_tensor = mask_tensor[0]
 
-        if mask_tensor.dim() == 3 and mask_tensor.shape[0] > 1:
-            mask_tensor = mask_tensor[0:1]
-
-        mask_np = (mask_tensor.cpu().numpy() * 255.0).clip(0, 255).astype(np.uint8)
+        if mask_tensor.dim() == 3:
+            mask_tensor = mask_tensor[0]
 
-        if mask_np.ndim == 3 and mask_np.shape[0] == 1:
-            mask_np = mask_np[0]
+        # Resize and quantize on the tensor's own device so only a single
+        # uint8 alpha plane is copied to the host.
+        width, height = target_size
+        if tuple(mask_tensor.shape) != (height, width):
+            mask_tensor = torch.nn.functional.interpolate(
+                mask_tensor[None, None].float(), size=(height, width), mode="nearest"
+            )[0, 0]
 
-        rgba = np.full((*mask_np.shape, 4), 255, dtype=np.uint8)
-        rgba[..., 3] = 255 - mask_np
+        alpha = 255 - mask_tensor.mul(255.0).clamp(0, 255).to(torch.uint8)
+        alpha_pil = Image.fromarray(alpha.cpu().numpy(), mode="L")
 
-        mask_pil = Image.fromarray(rgba, mode="RGBA")
-        if mask_pil.size != target_size:
-            mask_pil = mask_pil.resize(target_size, Image.NEAREST)
-        return mask_pil
+        # OpenAI only reads the alpha channel, so a two-channel LA PNG carries
+        # the same information as RGBA at half the size.
+        return Image.merge("LA", (Image.new("L", target_size, 255), alpha_pil))
 
     def _stack_image_tensors(self, tensors):
         return torch.cat(tensors, dim=0)
 
+    def _save_output_pil(self, pil_img, save_prefix):
+        full_output_folder, filename, counter, _, _ = folder_paths.get_save_image_path(
+            save_prefix, folder_paths.get_output_directory(), *pil_img.size
+        )
+        path = os.path.join(full_output_folder, f"{filename}_{counter:05}_.png")
+        pil_img.save(path, format="PNG", compress_level=4)
+        return path
+
+    def _replay_outputs(self, images_out, save_prefix):
+        # A cache hit writes and previews its images like a fresh run
+        pbar = ProgressBar(1)
+        frames = images_out if save_prefix else images_out[-1:]
+        output_pil = None
+        for output_pil in iter_pil_frames(frames):
+            if save_prefix:
+                self._save_output_pil(output_pil, save_prefix)
+        pbar.update_absolute(1, 1, ("JPEG", output_pil, 512))
+
+    def _save_info(self, info_out):
+        try:
+            self.save_content(info_out, "MaiOpenAiImageEdit")
+        except Exception as e:
+            print(f"[MaiOpenAiImageEdit] save_content failed: {e}")
+
     def _join_info_lines(self, lines):
         return "\n".join(lines)
 
     def call_image_edit(
         self,
-        image,
         url,
         api_key,
         model,
@@ -169,8 +219,12 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
         width,
         height,
         seed,
+        count=1,
+        image=None,
+        encoded_image=None,
         refs=None,
         mask=None,
+        save_prefix="",
     ):
         api_key = api_key.strip()
         if not api_key:
@@ -180,31 +234,85 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
         if not target_url:
             raise ValueError("[ERROR] No URL provided.")
 
-        pil_img = self._first_image_to_pil(image)
+        if image is None and encoded_image is None:
+            raise ValueError("[ERROR] No image provided.")
+
+        save_prefix = save_prefix.strip()
+
+        cache = get_cache()
+        if cache is not None:
+            # save_prefix is left out of the key on purpose: it only decides
+            # where the images are written, which also happens on a hit.
+            cache_key = make_key(
+                "MaiOpenAiImageEdit",
+                image=image,
+                encoded_image=encoded_image["sha256"] if encoded_image else None,
+                url=target_url,
+                model=model.strip(),
+                prompt=prompt,
+                quality=quality,
+                size=size,
+                width=width,
+                height=height,
+                seed=seed,
+                count=count,
+                refs=refs,
+                mask=mask,
+            )
+            cached = cache.get_tensor(cache_key)
+            if cached is not None:
+                images_out, meta = cached
+                info_out = meta.get("info", "")
+                self._replay_outputs(images_out, save_prefix)
+                self._save_info(info_out)
+                return (images_out, info_out)
+
         refs_pil = list(self._iter_batch_to_pil(refs)) if refs is not None else []
 
+        if encoded_image is not None:
+            # The original file bytes become the base image without a decode
+            base_data, _, _ = encoded_image_bytes(encoded_image, fallback="PNG")
+            base_part = Base64Part(base_data)
+            base_size = (encoded_image["width"], encoded_image["height"])
+            unique_pil, order = dedupe_images(refs_pil)
+            base_pil = []
+            refs_pil = unique_pil
+            ref_order = [k + 1 for k in order]
+        else:
+            pil_img = self._first_image_to_pil(image)
+            base_size = pil_img.size
+            # Frames repeated in refs (or equal to the base image) are encoded
+            # and uploaded once; the prompt maps the original numbering onto
+            # them.
+            unique_pil, order = dedupe_images([pil_img] + refs_pil)
+            base_pil = [pil_img]
+            refs_pil = unique_pil[1:]
+            ref_order = order[1:]
+
         native_size = self._resolve_size(size, width, height)
 
         prompt_items = self._split_prompt_items(prompt)
         if not prompt_items:
             raise ValueError("[ERROR] No prompt provided.")
 
-        mask_b64 = None
+        to_encode = base_pil + refs_pil
         if mask is not None:
-            mask_pil = self._mask_to_openai_alpha_pil(mask, pil_img.size)
-            mask_b64 = self._pil_to_b64_png(mask_pil)
+            to_encode.append(self._mask_to_openai_alpha_pil(mask, base_size))
 
-        base_b64 = self._pil_to_b64_png(pil_img)
-        ref_b64s = [self._pil_to_b64_png(r) for r in refs_pil]
+        encoded = self._encode_pngs(to_encode)
+        base_b64 = encoded[0] if base_pil else base_part
+        ref_b64s = encoded[len(base_pil) : len(base_pil) + len(refs_pil)]
+        mask_b64 = encoded[-1] if mask is not None else None
 
         headers = {"x-api-key": api_key, "Content-Type": "application/json"}
 
         output_images = []
         info_lines = []
+        pbar = ProgressBar(len(prompt_items))
 
         for prompt_idx, prompt_item in enumerate(prompt_items, 1):
             final_prompt = self._build_edit_prompt_with_references(
-                prompt_item, len(refs_pil)
+                prompt_item, len(refs_pil), ref_order
             )
 
             images_b64 = [base_b64] + ref_b64s
@@ -218,12 +326,17 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
             }
             if quality != "auto":
                 payload["quality"] = quality
+            if count > 1:
+                payload["n"] = count
             if mask_b64 is not None:
                 payload["mask"] = mask_b64
 
             try:
-                response = requests.post(
-                    target_url, headers=headers, json=payload, timeout=300
+                response = http_helpers.post(
+                    http_helpers.split_endpoints(target_url),
+                    headers=headers,
+                    data=JsonBody(payload),
+                    timeout=300,
                 )
             except requests.exceptions.RequestException as e:
                 raise RuntimeError(f"[REQUEST ERROR] {e}")
@@ -241,27 +354,33 @@ class MaiOpenAiImageEdit(PromptSaverMixin):
             if not data:
                 raise RuntimeError("[ERROR] Proxy returned no data.")
 
-            entry = data[0]
-            b64 = entry.get("b64_json")
-            if not b64:
-                raise RuntimeError("[ERROR] Proxy response missing b64_json.")
-            revised = entry.get("revised_prompt")
-
-            output_pil = self._base64_to_pil(b64)
-            output_images.append(self._pil_to_comfy_image(output_pil))
-            info_lines.append(
-                f"[{prompt_idx}/{len(prompt_items)}] "
-                + (revised or "Image edited.")
-                + f" | Reference images used: {len(refs_pil)}"
-                + f" | Output size requested: {native_size}"
+            for entry_idx, entry in enumerate(data, 1):
+                b64 = entry.get("b64_json")
+                if not b64:
+                    raise RuntimeError("[ERROR] Proxy response missing b64_json.")
+                revised = entry.get("revised_prompt")
+
+                output_pil = self._base64_to_pil(b64)
+                output_images.append(self._pil_to_comfy_image(output_pil))
+                if save_prefix:
+                    self._save_output_pil(output_pil, save_prefix)
+                info_lines.append(
+                    f"[{prompt_idx}/{len(prompt_items)}]"
+                    + (f"[{entry_idx}/{len(data)}] " if len(data) > 1 else " ")
+                    + (revised or "Image edited.")
+                    + f" | Reference images used: {len(refs_pil)}"
+                    + f" | Output size requested: {native_size}"
+                )
+
+            # Preview the newest image as soon as its prompt item is done
+            pbar.update_absolute(
+                prompt_idx, len(prompt_items), ("JPEG", output_pil, 512)
             )
 
         images_out = self._stack_image_tensors(output_images)
         info_out = self._join_info_lines(info_lines)
+        if cache is not None:
+            cache.put_tensor(cache_key, images_out, {"info": info_out})
 
-        try:
-            self.save_content(info_out, "MaiOpenAiImageEdit")
-        except Exception as e:
-            print(f"[MaiOpenAiImageEdit] save_content failed: {e}")
-
+        self._save_info(info_out)
         return (images_out, info_out)
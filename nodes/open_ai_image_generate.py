@@ -4,7 +4,10 @@ import torch
 from PIL import Image
 import numpy as np
 import base64
+from ..helpers import http_helpers
 from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers.cache_helpers import get_cache, make_key
+from ..helpers.image_helpers import stack_images, image_data_entries
 
 
 class MaiOpenAiImageGenerate(PromptSaverMixin):
@@ -39,10 +42,13 @@ class MaiOpenAiImageGenerate(PromptSaverMixin):
                 "width": ("INT", {"default": 0, "min": 0}),
                 "height": ("INT", {"default": 0, "min": 0}),
                 "seed": ("INT", {"default": 42}),
+                "count": ("INT", {"default": 1, "min": 1, "max": 10}),
+                "batch_count": ("INT", {"default": 1, "min": 1, "max": 64}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = ("IMAGE", "STRING")
+    RETURN_NAMES = ("images", "info")
     FUNCTION = "generate_image"
     CATEGORY = "mAI"
 
@@ -61,51 +67,131 @@ class MaiOpenAiImageGenerate(PromptSaverMixin):
 
         return "1024x1536"
 
-    def generate_image(
-        self,
-        url,
-        api_key,
-        prompt,
-        quality,
-        size,
-        width,
-        height,
-        seed,
-    ):
-        if not url.strip():
-            raise ValueError("[ERROR] No URL provided.")
-
-        headers = {"Content-Type": "application/json", "x-api-key": api_key.strip()}
-
-        payload = {
-            "prompt": prompt,
-            "quality": quality,
-            "size": self._get_size(size, width, height),
-            "seed": seed,
-        }
+    def _data_entries(self, data):
+        return image_data_entries(data)
 
+    def _request_images(self, url, headers, payload):
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                json=payload,
+                timeout=180,
+            )
             response.raise_for_status()
             result_json = response.json()
 
             if "data" not in result_json:
                 raise ValueError("[ERROR] The API returned an invalid response format.")
 
-            # Decode base64 image data
-            base64_data = result_json["data"]
-            image_data = base64.b64decode(base64_data)
+            entries = self._data_entries(result_json["data"])
+            if not entries:
+                raise ValueError("[ERROR] The API returned no images.")
+
+            image_tensors = []
+            revised_prompts = []
+            for base64_data, revised in entries:
+                if not base64_data:
+                    raise ValueError("[ERROR] The API returned an empty image.")
+
+                # Decode base64 image data
+                image_data = base64.b64decode(base64_data)
 
-            # Convert to PIL Image and ensure RGB
-            pil_image = Image.open(io.BytesIO(image_data)).convert("RGB")
+                # Convert to PIL Image and ensure RGB
+                pil_image = Image.open(io.BytesIO(image_data)).convert("RGB")
 
-            # Convert to tensor in ComfyUI format (B, H, W, C)
-            image_tensor = torch.from_numpy(np.array(pil_image)).float() / 255.0
-            image_tensor = image_tensor.unsqueeze(0)
+                # Convert to tensor in ComfyUI format (B, H, W, C)
+                image_tensor = torch.from_numpy(np.array(pil_image)).float() / 255.0
+                image_tensors.append(image_tensor.unsqueeze(0))
+                revised_prompts.append(revised)
 
-            return (image_tensor,)
+            return stack_images(image_tensors), revised_prompts
 
         except requests.exceptions.RequestException as e:
             raise RuntimeError(f"[REQUEST ERROR] {e}")
         except base64.binascii.Error as e:
             raise RuntimeError(f"[BASE64 DECODE ERROR] {e}")
+
+    def generate_image(
+        self,
+        url,
+        api_key,
+        prompt,
+        quality,
+        size,
+        width,
+        height,
+        seed,
+        count=1,
+        batch_count=1,
+    ):
+        if not url.strip():
+            raise ValueError("[ERROR] No URL provided.")
+
+        cache = get_cache()
+        if cache is not None:
+            cache_key = make_key(
+                "MaiOpenAiImageGenerate",
+                url=url.strip(),
+                prompt=prompt,
+                quality=quality,
+                size=size,
+                width=width,
+                height=height,
+                seed=seed,
+                count=count,
+                batch_count=batch_count,
+            )
+            cached = cache.get_tensor(cache_key)
+            if cached is not None:
+                images, meta = cached
+                return (images, meta.get("info", ""))
+
+        headers = {"Content-Type": "application/json", "x-api-key": api_key.strip()}
+
+        payloads = []
+        for item in range(batch_count):
+            payload = {
+                "prompt": prompt,
+                "quality": quality,
+                "size": self._get_size(size, width, height),
+                # Deterministic seed offset per batch item
+                "seed": seed + item,
+            }
+            if count > 1:
+                payload["n"] = count
+            payloads.append(payload)
+
+        if batch_count == 1:
+            results = [self._request_images(url, headers, payloads[0])]
+        else:
+            results = http_helpers.map_concurrent(
+                lambda payload: self._request_images(url, headers, payload),
+                payloads,
+                max_workers=batch_count,
+            )
+
+        image_tensors = []
+        info_lines = []
+        for item, result in enumerate(results, 1):
+            prefix = f"[{item}/{batch_count}]" if batch_count > 1 else ""
+            if isinstance(result, Exception):
+                info_lines.append(f"{prefix} FAILED: {result}")
+                continue
+            images, revised_prompts = result
+            image_tensors.append(images)
+            for idx, revised in enumerate(revised_prompts, 1):
+                info_lines.append(
+                    f"{prefix}[{idx}/{len(revised_prompts)}] "
+                    + (revised or "Image generated.")
+                )
+
+        if not image_tensors:
+            raise RuntimeError("\n".join(info_lines))
+
+        images = stack_images(image_tensors)
+        info = "\n".join(info_lines)
+        if cache is not None and len(image_tensors) == len(results):
+            cache.put_tensor(cache_key, images, {"info": info})
+
+        return (images, info)
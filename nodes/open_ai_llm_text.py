@@ -1,6 +1,11 @@
 import requests
 import json
-from ..helpers.prompt_helpers import PromptSaverMixin
+from ..helpers import http_helpers
+from ..helpers.prompt_helpers import (
+    PromptSaverMixin,
+    prompt_cache_key,
+    cached_token_count,
+)
 
 
 class MaiOpenAiLLMText(PromptSaverMixin):
@@ -46,11 +51,12 @@ class MaiOpenAiLLMText(PromptSaverMixin):
                     {"default": "auto", "multiline": False},
                 ),
                 "seed": ("INT", {"default": 42}),
+                "prompt_cache": ("BOOLEAN", {"default": True}),
             }
         }
 
-    RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("text", "reasoning")
+    RETURN_TYPES = ("STRING", "STRING", "INT")
+    RETURN_NAMES = ("text", "reasoning", "cached_tokens")
     FUNCTION = "call_llm"
     CATEGORY = "mAI"
 
@@ -67,6 +73,7 @@ class MaiOpenAiLLMText(PromptSaverMixin):
         reasoning_effort,
         reasoning_summary,
         seed,
+        prompt_cache=True,
     ):
         if not url.strip():
             raise ValueError("[ERROR] No URL provided.")
@@ -91,8 +98,16 @@ class MaiOpenAiLLMText(PromptSaverMixin):
             if reasoning_summary.strip():
                 payload["reasoning"]["summary"] = reasoning_summary
 
+        if prompt_cache and system_prompt.strip():
+            payload["prompt_cache_key"] = prompt_cache_key(model, system_prompt)
+
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=180)
+            response = http_helpers.post(
+                http_helpers.split_endpoints(url),
+                headers=headers,
+                json=payload,
+                timeout=180,
+            )
             response.raise_for_status()
             data = response.json()
             llm_text = data.get("data", "")
@@ -103,7 +118,7 @@ class MaiOpenAiLLMText(PromptSaverMixin):
 
             self.save_content(llm_text, "MaiOpenAiLLMText-text")
             self.save_content(reasoning, "MaiOpenAiLLMText-reasoning")
-            return (llm_text, reasoning)
+            return (llm_text, reasoning, cached_token_count(data))
         except requests.exceptions.RequestException as e:
             error_message = f"[REQUEST ERROR] {e}"
 